@@ -0,0 +1,88 @@
+import json
+from datetime import datetime
+
+from db import Base, session, engine
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+
+
+# The job model: a long running admin operation that is run in the background by the jobs worker
+class Job(Base):
+    __tablename__ = 'jobs'
+
+    job_id = Column(Integer, primary_key=True)
+    kind = Column(String)  # The name of the job handler
+    arguments = Column(String)  # JSON
+    status = Column(String)  # queued, running, done, failed or cancelled
+    progress = Column(String)
+    attempts = Column(Integer)
+    guild_id = Column(BigInteger)
+    channel_id = Column(BigInteger)  # The channel the job reports to
+    author_id = Column(BigInteger)
+    error = Column(String)
+    created_at = Column(DateTime)  # In UTC
+
+    # Constructor and str
+    def __init__(self, kind, arguments, guild_id, channel_id, author_id):
+        self.kind = kind
+        self.arguments = json.dumps(arguments)
+        self.status = 'queued'
+        self.progress = ''
+        self.attempts = 0
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.author_id = author_id
+        self.error = None
+        self.created_at = datetime.utcnow()
+
+    def __repr__(self):
+        return f'<Job(job_id={self.job_id}, kind={self.kind}, status={self.status})>'
+
+    def get_arguments(self):
+        return json.loads(self.arguments)
+
+    # Static interface
+    @staticmethod
+    def get(job_id):
+        job = session.query(Job).filter_by(job_id=job_id).first()
+        return job if job else None
+
+    @staticmethod
+    def get_next():  # Gets the oldest queued job
+        job = session.query(Job).filter_by(status='queued').order_by(Job.job_id).first()
+        return job if job else None
+
+    @staticmethod
+    def get_active():  # Gets the queued and the running jobs
+        return session.query(Job).filter(Job.status.in_(['queued', 'running'])).order_by(Job.job_id).all()
+
+    @staticmethod
+    def add(kind, arguments, guild_id, channel_id, author_id):
+        job = Job(kind, arguments, guild_id, channel_id, author_id)
+        session.add(job)
+        session.commit()
+        return job
+
+    @staticmethod
+    def set_status(job, status, error=None):
+        job.status = status
+        job.error = error
+        session.commit()
+
+    @staticmethod
+    def set_progress(job, progress):
+        job.progress = progress
+        session.commit()
+
+    @staticmethod
+    def retry(job, error):
+        job.attempts += 1
+        job.status = 'queued'
+        job.error = error
+        session.commit()
+
+    @staticmethod
+    def get_running():
+        return session.query(Job).filter_by(status='running').order_by(Job.job_id).all()
+
+
+Base.metadata.create_all(engine)
@@ -1,4 +1,5 @@
 from db import Base, session, engine
+from listing_cache import invalidate_team
 from sqlalchemy import Column, String, BigInteger
 from sqlalchemy.orm import relationship
 
@@ -33,7 +34,8 @@ class Team(Base):
 
     # Static interface
     @staticmethod
-    def get(team_name: str = None, github_id: int = None, category_id: int = None):
+    def get(team_name: str = None, github_id: int = None, category_id: int = None, role_id: int = None,
+            repo_id: int = None):
         if team_name:
             assert isinstance(team_name, str)
             team = session.query(Team).filter_by(team_name=team_name).first()
@@ -43,6 +45,12 @@ class Team(Base):
         elif category_id:
             assert isinstance(category_id, int)
             team = session.query(Team).filter_by(category_id=category_id).first()
+        elif role_id:
+            assert isinstance(role_id, int)
+            team = session.query(Team).filter_by(role_id=role_id).first()
+        elif repo_id:
+            assert isinstance(repo_id, int)
+            team = session.query(Team).filter_by(repo_id=repo_id).first()
         else:
             team = session.query(Team).all()
         return team if team else None
@@ -52,6 +60,14 @@ class Team(Base):
         teams = session.query(Team).all()
         return teams if teams else None
 
+    @staticmethod
+    def get_page(offset, limit):
+        return session.query(Team).order_by(Team.team_name).offset(offset).limit(limit).all()
+
+    @staticmethod
+    def count():
+        return session.query(Team).count()
+
     @staticmethod
     def set(team_name, role_id, leader_role_id, category_id, general_id, github_id, repo_id):
         team: Team = Team.get(team_name)
@@ -67,6 +83,7 @@ class Team(Base):
             session.add(team)
 
         session.commit()
+        invalidate_team(team_name)
 
     @staticmethod
     def set_voting_channel(team_name, voting_id):
@@ -91,6 +108,7 @@ class Team(Base):
             return
         session.delete(team)
         session.commit()
+        invalidate_team(team_name)
 
 
 Base.metadata.create_all(engine)
@@ -0,0 +1,77 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime
+
+from db import Base, session, engine
+
+
+# The team invite model: the long-lived invite of a team channel that is put in the reddit posts of the team, along with
+# how many posts used it and how many members joined through it
+class TeamInvite(Base):
+    __tablename__ = 'team_invites'
+
+    channel_id = Column(BigInteger, primary_key=True)
+    team_name = Column(String)
+    code = Column(String)
+    url = Column(String)
+    posts = Column(Integer)  # The number of reddit posts the invite was put in
+    uses = Column(Integer)  # As of the last time the invite was checked
+    checked_at = Column(DateTime)  # In UTC
+
+    # Constructor and str
+    def __init__(self, channel_id, team_name, code, url):
+        self.channel_id = channel_id
+        self.team_name = team_name
+        self.code = code
+        self.url = url
+        self.posts = 0
+        self.uses = 0
+        self.checked_at = datetime.utcnow()
+
+    def __repr__(self):
+        return f'<TeamInvite(channel_id={self.channel_id}, team_name={self.team_name}, code={self.code}, ' \
+               f'uses={self.uses})>'
+
+    # Static interface
+    @staticmethod
+    def get(channel_id):
+        team_invite = session.query(TeamInvite).filter_by(channel_id=channel_id).first()
+        return team_invite if team_invite else None
+
+    @staticmethod
+    def get_all():
+        return session.query(TeamInvite).order_by(TeamInvite.team_name).all()
+
+    @staticmethod
+    def set(channel_id, team_name, code, url):  # Sets the invite of a channel, the counts start over for a new invite
+        TeamInvite.delete(channel_id)
+        team_invite = TeamInvite(channel_id, team_name, code, url)
+        session.add(team_invite)
+        session.commit()
+        return team_invite
+
+    @staticmethod
+    def set_uses(team_invite, uses):
+        team_invite.uses = uses
+        team_invite.checked_at = datetime.utcnow()
+        session.commit()
+
+    @staticmethod
+    def add_post(team_invite):
+        team_invite.posts += 1
+        session.commit()
+
+    @staticmethod
+    def delete(channel_id):
+        team_invite = TeamInvite.get(channel_id)
+        if team_invite:
+            session.delete(team_invite)
+            session.commit()
+
+    @staticmethod
+    def delete_code(code):  # Deletes an invite that was revoked
+        session.query(TeamInvite).filter_by(code=code).delete()
+        session.commit()
+
+
+Base.metadata.create_all(engine)
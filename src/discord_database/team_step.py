@@ -0,0 +1,52 @@
+from db import Base, session, engine
+from sqlalchemy import Column, String, BigInteger
+
+
+# The team step model: the steps of a team creation that are done along with the id of what each step has created.
+# The steps of a team are deleted when its creation ends
+class TeamStep(Base):
+    __tablename__ = 'team_steps'
+
+    team_name = Column(String, primary_key=True)
+    step = Column(String, primary_key=True)
+    value = Column(BigInteger)
+
+    # Constructor and str
+    def __init__(self, team_name, step, value):
+        self.team_name = team_name
+        self.step = step
+        self.value = value
+
+    def __repr__(self):
+        return f'<TeamStep(team_name={self.team_name}, step={self.step}, value={self.value})>'
+
+    # Static interface
+    @staticmethod
+    def get(team_name, step):
+        team_step = session.query(TeamStep).filter_by(team_name=team_name).filter_by(step=step).first()
+        return team_step.value if team_step else None
+
+    @staticmethod
+    def get_unfinished():  # Gets the names of the teams whose creation has been interrupted
+        team_steps = session.query(TeamStep.team_name).distinct().all()
+        return [team_step.team_name for team_step in team_steps]
+
+    @staticmethod
+    def set(team_name, step, value):
+        team_step = session.query(TeamStep).filter_by(team_name=team_name).filter_by(step=step).first()
+
+        if team_step:
+            team_step.value = value
+        else:
+            team_step = TeamStep(team_name, step, value)
+            session.add(team_step)
+
+        session.commit()
+
+    @staticmethod
+    def delete_team(team_name):
+        session.query(TeamStep).filter_by(team_name=team_name).delete()
+        session.commit()
+
+
+Base.metadata.create_all(engine)
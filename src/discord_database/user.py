@@ -1,6 +1,7 @@
 from sqlalchemy.orm import relationship
 
 from db import Base, session, engine
+from listing_cache import invalidate_team
 from sqlalchemy import Column, String, Integer, BigInteger, ForeignKey
 
 
@@ -43,6 +44,28 @@ class User(Base):
         team = session.query(User).filter_by(user_team=user_team).all()
         return team if team else None
 
+    @staticmethod
+    def get_teams_of(user_id):  # Gets the users rows of a user in all their teams
+        return session.query(User).filter_by(user_id=user_id).all()
+
+    @staticmethod
+    def get_user_ids():  # Gets the ids of the users that are in at least one team
+        return {user_id for user_id, in session.query(User.user_id).distinct()}
+
+    @staticmethod
+    def get_page(offset, limit, user_team=None):  # Gets a page of the users of a team, or of all the teams
+        query = session.query(User)
+        if user_team:
+            query = query.filter_by(user_team=user_team)
+        return query.order_by(User.unique_id).offset(offset).limit(limit).all()
+
+    @staticmethod
+    def count(user_team=None):
+        query = session.query(User)
+        if user_team:
+            query = query.filter_by(user_team=user_team)
+        return query.count()
+
     @staticmethod
     def set(user_id, user_team, user_github, user_github_id):
         user = User.get(user_id, user_team)
@@ -56,6 +79,7 @@ class User(Base):
             session.add(user)
 
         session.commit()
+        invalidate_team(user_team)
 
     @staticmethod
     def set_init(user_id, user_team, user_github, user_github_id):
@@ -71,6 +95,19 @@ class User(Base):
         if user:
             session.delete(user)
             session.commit()
+            invalidate_team(user_team)
+
+    @staticmethod
+    def delete_user(user_id):  # Deletes a user from all their teams
+        users = session.query(User).filter_by(user_id=user_id).all()
+        if not users:
+            return
+        teams = [user.user_team for user in users]
+        for user in users:
+            session.delete(user)
+        session.commit()
+        for team in teams:
+            invalidate_team(team)
 
     @staticmethod
     def delete_team(team):
@@ -80,6 +117,7 @@ class User(Base):
         for user in users:
             session.delete(user)
         session.commit()
+        invalidate_team(team)
 
 
 Base.metadata.create_all(engine)
@@ -2,18 +2,31 @@ from discord_database.config import Config
 from discord_database.user import User
 from discord_database.team import Team
 from discord_database.warn import Warn
+from discord_database.job import Job
+from discord_database.team_invite import TeamInvite
 
 import discord
-from github import Github, UnknownObjectException
-import praw
-import prawcore.exceptions
+from github import UnknownObjectException
 
+from discord_interface.admission import gates, get_command_limits, set_command_limits as set_limits, \
+    DEFAULT_COMMAND_LIMITS
 from discord_interface.common_functions import delete_entire_team
-from discord_interface.member_interface import github_token, org_name
+from discord_interface.reconciliation import reconcile_database
+from discord_interface.membership_reconciler import reconcile_all_teams
+from discord_interface.jobs import job_handler, enqueue_job, cancel_job as cancel_background_job
+from discord_interface.paginator import Paginator
+from github_interface.github_scheduler import github_call, scheduler, BULK, PRIORITY_NAMES
+from load_monitor import load_monitor, LOAD_NAMES
+from loop_watchdog import loop_watchdog
+from metrics import metrics
 
 from reddit_database.languages import Language
-from reddit_interface.reddit_configuration import client_secret, client_id, username, password, USER_AGENT
+from reddit_database.subreddit_status import SubredditStatus
+from reddit_interface.language_index import language_index, normalize_language
+from reddit_interface.reddit_client import subreddit_exists
 
+# The number of commands and calls #!perf shows
+PERF_ROWS = 8
 
 # Setup function
 def setup_admin_interface(bot):
@@ -72,21 +85,24 @@ def setup_admin_interface(bot):
         if not ctx.author.guild_permissions.administrator:
             return await you_are_not_admin(ctx)
 
-        commands = bot.commands
-        commands_str = '```'
-        for command in commands:  # Get all the commands
-            if not command.hidden:  # The command must be hidden
-                continue
-            commands_str += command.name  # Add the command name
-            parameters = command.clean_params
+        commands = [command for command in bot.commands if command.hidden]  # The commands must be hidden
+
+        async def render(embed, page_commands):
+            commands_str = '```'
+            for command in page_commands:
+                commands_str += command.name  # Add the command name
+                parameters = command.clean_params
 
-            for parameter in parameters.keys():
-                commands_str += f' [{parameter}]'  # Add the parameter name
-            commands_str += "\n"  # Add a new line
+                for parameter in parameters.keys():
+                    commands_str += f' [{parameter}]'  # Add the parameter name
+                commands_str += "\n"  # Add a new line
 
-        commands_str += '```'
+            commands_str += '```'
+            embed.description = commands_str
 
-        await ctx.send(commands_str)
+        paginator = Paginator(bot, ctx, "Admin commands", lambda: len(commands),
+                              lambda offset, limit: commands[offset:offset + limit], render)
+        await paginator.start()
 
     @bot.command(hidden=True)
     async def change_voting_period(ctx, days, hours="0", minutes="0", seconds="0"):
@@ -114,28 +130,16 @@ def setup_admin_interface(bot):
 
     @bot.command(hidden=True, brief="Deletes from the database the teams which don't have roles")
     async def clean_up_db(ctx):
-        roles = ctx.guild.roles
-        teams = Team.get_all()
-        if not teams:
-            return await ctx.send("There are no teams to clean up.")
-        deleted_teams = 0
-        # Deletes the teams that don't have associated roles
-        for team in teams:
-            if ctx.guild.get_role(team.role_id) in roles:
-                continue
-            team.delete_team(team.team_name)
-            deleted_teams += 1
-
-        users = User.get_teams()
-        deleted_users = 0
-        # Deletes the users that aren't in the server
-        for user in users:
-            if ctx.guild.get_member(user.user_id):
-                continue
-            User.delete(user.user_id, user.user_team)
-            deleted_users += 1
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        await enqueue_job(ctx, 'clean_up_db', unique=True)
 
-        await ctx.send(f'Database cleaned up. Deleted {deleted_teams} team(s) and {deleted_users} user(s).')
+    @job_handler('clean_up_db', retries=2)
+    async def run_clean_up_db(job, guild, channel, report):
+        # Deletes the teams that don't have associated roles and the users that aren't in the server. This also runs
+        # periodically and the member, role and channel events keep the database up to date in between
+        deleted_teams, deleted_users = reconcile_database(guild)
+        await channel.send(f'Database cleaned up. Deleted {deleted_teams} team(s) and {deleted_users} user(s).')
 
     @bot.command(hidden=True)
     async def change_github_required_percentage(ctx, percentage):
@@ -230,7 +234,13 @@ def setup_admin_interface(bot):
     async def delete_team(ctx, team_name):
         if not ctx.author.guild_permissions.administrator:
             return await you_are_not_admin(ctx)
-        await delete_entire_team(bot, ctx, team_name, github_token, org_name)
+        await enqueue_job(ctx, 'delete_team', team_name=team_name)
+
+    @job_handler('delete_team', retries=2)  # Deleting a team can be run again if it gets interrupted
+    async def run_delete_team(job, guild, channel, report, team_name):
+        await report(f'Deleting the `{team_name}` team...')
+        await delete_entire_team(bot, guild, channel, team_name)
+        await report("Done.")
 
     @bot.command(hidden=True, brief="Removes a warning from a member")
     async def unwarn(ctx, user):
@@ -249,22 +259,146 @@ def setup_admin_interface(bot):
         if not ctx.author.guild_permissions.administrator:
             return await you_are_not_admin(ctx)
 
-        await ctx.send("Please wait...")
+        await enqueue_job(ctx, 'set_users_ids', unique=True)
+
+    @job_handler('set_users_ids', retries=2)
+    async def run_set_users_ids(job, guild, channel, report):
         users = User.get_teams()
-        g = Github(github_token)
         limit = len(users)
         i = 1
+        deleted_users = 0
         for user in users:
-            await ctx.send(f"Setting the Github id of user ({i}/{limit})")
+            await report(f"Setting the Github id of user ({i}/{limit})")
             try:
-                github_user = g.get_user(user.user_github)
+                github_user = await github_call(lambda g: g.get_user(user.user_github), priority=BULK)
                 User.set(user.user_id, user.user_team, user.user_github, github_user.id)
-                await ctx.send("Success!")
             except UnknownObjectException:
                 User.delete(user.user_id, user.user_team)
-                await ctx.send("Failed, deleting user.")
+                deleted_users += 1
             i += 1
-        await ctx.send("Done.")
+        await report(f"Done. Deleted {deleted_users} user(s) whose GitHub accounts weren't found.")
+
+    # Makes the team roles, the users table and the GitHub teams agree. Without "apply" it only shows what it would
+    # change
+    @bot.command(hidden=True, brief="Syncs the teams members between Discord, the database and GitHub")
+    async def reconcile_teams(ctx, mode=''):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        await enqueue_job(ctx, 'reconcile_teams', unique=True, dry_run=mode.lower() != 'apply')
+
+    @job_handler('reconcile_teams', retries=2)
+    async def run_reconcile_teams(job, guild, channel, report, dry_run):
+        diffs = await reconcile_all_teams(guild, dry_run, report)
+        if not diffs:
+            return await report("Done. All the teams are in sync.")
+        await report(f'Done. {len(diffs)} team(s) ' + ('are out of sync:' if dry_run else 'were synced:'))
+
+        content = ''
+        for diff in diffs:  # Sends the changes in as few messages as possible
+            line = diff.describe() + '\n'
+            if len(content) + len(line) > 2000:
+                await channel.send(content)
+                content = ''
+            content += line
+        await channel.send(content)
+        if dry_run:
+            await channel.send("Use `#!reconcile_teams apply` to apply these changes.")
+
+    @bot.command(hidden=True, brief="Lists the queued and running background jobs")
+    async def jobs(ctx):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        active_jobs = Job.get_active()
+        if not active_jobs:
+            return await ctx.send("There are no queued or running jobs.")
+
+        content = '```\n'
+        for job in active_jobs:
+            content += f'#{job.job_id} | {job.kind} | {job.status} | {job.progress or "-"}\n'
+        content += '```'
+        await ctx.send(content)
+
+    @bot.command(hidden=True, brief="Cancels a queued or running background job")
+    async def cancel_job(ctx, job_id):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        try:
+            job = Job.get(int(job_id.lstrip('#')))
+        except ValueError:
+            return await ctx.send(ctx.author.mention + ", please input a valid job id.")
+        if not job or job.status not in ('queued', 'running'):
+            return await ctx.send("There is no queued or running job with this id.")
+        cancel_background_job(job)
+        await ctx.send(f'Cancelled job `#{job.job_id}`.')
+
+    @bot.command(hidden=True, brief="Shows the remaining GitHub rate limits and the queued GitHub requests")
+    async def github_budget(ctx):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        await scheduler.refresh_budgets()
+
+        embed = discord.Embed(title="GitHub budget")
+        for budget in scheduler.budgets.values():
+            minutes_to_reset = round(budget.seconds_to_reset() / 60)
+            embed.add_field(name=budget.name, value=f'{budget.remaining}/{budget.limit}\n'
+                                                    f'Resets in {minutes_to_reset} minute(s)')
+        queued = '\n'.join(f'{PRIORITY_NAMES[priority]}: {len(queue)}'
+                           for priority, queue in scheduler.queues.items())
+        embed.add_field(name="Queued requests", value=queued, inline=False)
+        embed.add_field(name="Running requests", value=str(scheduler.running))
+        embed.add_field(name="Bulk reserve", value=str(scheduler.bulk_reserve()))
+        await ctx.send(embed=embed)
+
+    @bot.command(hidden=True, brief="Shows the event loop lag and the deferred and refused work")
+    async def load(ctx):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        elevated_lag, critical_lag = load_monitor.get_thresholds()
+        embed = discord.Embed(title=f'Load: {LOAD_NAMES[load_monitor.level]}')
+        embed.add_field(name="Event loop lag", value=f'{load_monitor.lag * 1000:.0f}ms')
+        embed.add_field(name="Highest lag", value=f'{load_monitor.max_lag * 1000:.0f}ms')
+        embed.add_field(name="Thresholds", value=f'Elevated: {elevated_lag * 1000:.0f}ms\n'
+                                                 f'Critical: {critical_lag * 1000:.0f}ms')
+        deferred = '\n'.join(f'{name}: {number}' for name, number in load_monitor.deferred.most_common())
+        shed = '\n'.join(f'{name}: {number}' for name, number in load_monitor.shed.most_common())
+        embed.add_field(name="Deferred work", value=deferred or "None", inline=False)
+        embed.add_field(name="Refused work", value=shed or "None", inline=False)
+        blocks = '\n'.join(f'{name}: {number} time(s), up to {loop_watchdog.longest_blocks.get(name, 0):.2f}s'
+                           for name, number in loop_watchdog.blocks.most_common(10))
+        embed.add_field(name=f'Handlers that blocked the loop for over {loop_watchdog.threshold:g}s',
+                        value=blocks[:1024] or "None", inline=False)
+        await ctx.send(embed=embed)
+
+    @bot.command(hidden=True, brief="Sets how many times a command can run at once, per user and in the queue")
+    async def set_command_limits(ctx, command_name, global_limit, user_limit, queue_size):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        if not bot.get_command(command_name):
+            return await ctx.send(ctx.author.mention + ", unknown command.")
+        try:
+            limits = [int(global_limit), int(user_limit), int(queue_size)]
+        except ValueError:
+            return await ctx.send(ctx.author.mention + ", please input valid integers.")
+        if limits[0] < 1 or limits[1] < 1 or limits[2] < 0:
+            return await ctx.send(ctx.author.mention + ", the limits must be at least 1 and the queue size at least 0.")
+        set_limits(command_name, *limits)
+        await ctx.send(f'`#!{command_name}` can now run {limits[0]} time(s) at once, {limits[1]} time(s) per user and '
+                       f'queue {limits[2]} invocation(s).')
+
+    @bot.command(hidden=True, brief="Shows the limits of the commands and their running and queued invocations")
+    async def command_limits(ctx):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        embed = discord.Embed(title="Command limits")
+        for command_name in sorted(set(DEFAULT_COMMAND_LIMITS) | set(gates)):
+            limits = get_command_limits(command_name)
+            if not limits:
+                continue
+            gate = gates.get(command_name)
+            running, queued = (gate.running, len(gate.waiters)) if gate else (0, 0)
+            embed.add_field(name=command_name, value=f'Limits: {limits[0]} / {limits[1]} per user / {limits[2]} '
+                                                     f'queued\nRunning: {running}, queued: {queued}')
+        await ctx.send(embed=embed)
 
     @bot.command(hidden=True, brief="Adds a new subreddit for a certain language")
     async def add_subreddit(ctx, language, subreddit_name: str):
@@ -272,22 +406,17 @@ def setup_admin_interface(bot):
             return await you_are_not_admin(ctx)
         await ctx.send("Please wait...")
         subreddit_name = subreddit_name.replace("r/", "")
+        language = normalize_language(language)
         if Language.get(language, subreddit_name):
             return await ctx.send("The subreddit already exists for this language.")
 
-        reddit = praw.Reddit(
-            client_id=client_id,
-            client_secret=client_secret,
-            user_agent=USER_AGENT,
-            username=username,
-            password=password
-        )
-        try:
-            reddit.subreddit(subreddit_name).fullname
-        except (prawcore.exceptions.NotFound, prawcore.exceptions.Redirect):
+        if not await subreddit_exists(subreddit_name):
             return await ctx.send("Could not add this subreddit")
+        SubredditStatus.set(subreddit_name, True)
+        language_index.set_subreddit_status(subreddit_name, True)
 
         Language.set(language, subreddit_name)
+        language_index.add(language, subreddit_name)
         await ctx.send("The subreddit has been added successfully")
 
     @bot.command(hidden=True, brief="Deletes a subreddit for a certain language")
@@ -295,9 +424,50 @@ def setup_admin_interface(bot):
         if not ctx.author.guild_permissions.administrator:
             return await you_are_not_admin(ctx)
         subreddit_name = subreddit_name.replace("r/", "")
+        language_name = normalize_language(language_name)
 
         language = Language.get(language_name, subreddit_name)
         if not language:
             return await ctx.send("The subreddit does not exist for this language.")
         Language.delete(language_name, subreddit_name)
+        language_index.remove(language_name, subreddit_name)
         await ctx.send("Done.")
+
+    @bot.command(hidden=True, brief="Shows how many members joined through the invites of the teams reddit posts")
+    async def invite_stats(ctx):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+        team_invites = TeamInvite.get_all()
+        if not team_invites:
+            return await ctx.send("No reddit post invites were created yet.")
+        content = '```\n'
+        for team_invite in team_invites:
+            content += f'{team_invite.team_name} | {team_invite.code} | {team_invite.posts} post(s) | ' \
+                       f'{team_invite.uses} join(s) as of {team_invite.checked_at:%Y-%m-%d %H:%M} UTC\n'
+        content += '```'
+        await ctx.send(content[:2000])
+
+    @bot.command(hidden=True, brief="Shows the slowest commands and calls, their error rates and the caches hit ratios")
+    async def perf(ctx):
+        if not ctx.author.guild_permissions.administrator:
+            return await you_are_not_admin(ctx)
+
+        def describe(histogram, errors):
+            return f'{histogram.count} run(s), avg {histogram.sum / histogram.count * 1000:.0f}ms, ' \
+                   f'p95 ≤ {histogram.get_quantile(0.95) * 1000:.0f}ms, {errors / histogram.count:.0%} errors'
+
+        with metrics.lock:
+            commands = sorted(metrics.commands.items(), key=lambda item: item[1].get_quantile(0.95), reverse=True)
+            commands = '\n'.join(f'`#!{name}`: {describe(histogram, metrics.command_errors[name])}'
+                                 for name, histogram in commands[:PERF_ROWS])
+            calls = sorted(metrics.calls.items(), key=lambda item: item[1].sum / item[1].count, reverse=True)
+            calls = '\n'.join(f'{key[0]} `{key[1]}`: {describe(histogram, metrics.call_errors[key])}'
+                              for key, histogram in calls[:PERF_ROWS])
+        caches = '\n'.join(f'{name}: {ratio:.0%} ({hits} hit(s), {misses} miss(es))'
+                           for name, (hits, misses, ratio) in metrics.get_cache_ratios().items())
+
+        embed = discord.Embed(title="Performance since the bot started")
+        embed.add_field(name="Slowest commands", value=commands[:1024] or "None", inline=False)
+        embed.add_field(name="Slowest calls", value=calls[:1024] or "None", inline=False)
+        embed.add_field(name="Caches", value=caches or "None", inline=False)
+        await ctx.send(embed=embed)
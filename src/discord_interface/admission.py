@@ -0,0 +1,153 @@
+import asyncio
+import time
+from collections import deque
+
+import discord.ext.commands
+
+from discord_database.config import Config
+from load_monitor import load_monitor, LOW_PRIORITY_COMMANDS
+from metrics import metrics
+from tracing import tracer, span
+
+# The default limits of the expensive commands as "global limit,per user limit,queue size". The limits of a command are
+# read from the command-limits-{command name} config, so they can be changed with #!set_command_limits
+DEFAULT_COMMAND_LIMITS = {
+    'list_members': '2,1,5',
+    'list_teams': '2,1,5',
+    'list_subreddits': '2,1,5',
+    'add_me': '3,1,10',
+    'remove_me': '3,1,10',
+    'activity_check': '1,1,0',
+    'set_users_ids': '1,1,0',
+    'reddit_post': '2,1,5',
+}
+
+
+# Raised when a command can't run or be queued, the message is sent to the author
+class CommandLimited(discord.ext.commands.CommandError):
+    pass
+
+
+# The invocations of a command that are running and queued
+class CommandGate:
+    def __init__(self):
+        self.running = 0
+        self.global_limit = 1
+        self.users = {}  # The user ids mapped to the number of their running and queued invocations
+        self.waiters = deque()  # The futures of the queued invocations, in order
+
+    def remove_user(self, user_id):
+        self.users[user_id] -= 1
+        if not self.users[user_id]:
+            del self.users[user_id]
+
+    # Lets the queued invocations run while there are free slots
+    def wake(self):
+        while self.waiters and self.running < self.global_limit:
+            waiter = self.waiters.popleft()
+            if waiter.done():  # The invocation was cancelled while queued
+                continue
+            self.running += 1
+            waiter.set_result(None)
+
+    def release(self, user_id):
+        self.running -= 1
+        self.remove_user(user_id)
+        self.wake()
+
+
+gates = {}  # The command names mapped to their gates
+
+
+def get_command_limits(command_name):
+    limits = Config.get(f'command-limits-{command_name}')
+    if not limits:
+        return None
+    global_limit, user_limit, queue_size = (int(limit) for limit in limits.split(','))
+    return global_limit, user_limit, queue_size
+
+
+def set_command_limits(command_name, global_limit, user_limit, queue_size):
+    Config.set(f'command-limits-{command_name}', f'{global_limit},{user_limit},{queue_size}')
+
+
+# Defers or refuses the low priority commands when the bot is busy, then lets the command run if there is a free slot,
+# queues it if the queue isn't full or raises CommandLimited. A user can only have user_limit invocations of a command
+# running or queued, so a single user can't fill the queue. The run time of the command is measured from the moment it
+# gets its slot
+async def admit_command(ctx):
+    command_name = ctx.command.qualified_name
+    if command_name in LOW_PRIORITY_COMMANDS:  # The low priority commands wait or get refused when the bot is busy
+        if load_monitor.should_shed(f'#!{command_name}'):
+            raise CommandLimited(f'{ctx.author.mention}, the bot is very busy right now, please try '
+                                 f'`#!{command_name}` again in a few minutes.')
+        with span('load deferral'):
+            await load_monitor.defer(f'#!{command_name}')
+
+    limits = get_command_limits(command_name)
+    if not limits:
+        ctx.command_started = time.perf_counter()
+        return
+    global_limit, user_limit, queue_size = limits
+    gate = gates.setdefault(command_name, CommandGate())
+    gate.global_limit = global_limit
+    user_id = ctx.author.id
+
+    if gate.users.get(user_id, 0) >= user_limit:
+        raise CommandLimited(f'{ctx.author.mention}, you already have `#!{command_name}` running, please wait for '
+                             f'it to finish.')
+
+    if gate.running < global_limit and not gate.waiters:
+        gate.running += 1
+        gate.users[user_id] = gate.users.get(user_id, 0) + 1
+    elif len(gate.waiters) >= queue_size:
+        raise CommandLimited(f'{ctx.author.mention}, `#!{command_name}` is busy right now, please try again later.')
+    else:
+        waiter = asyncio.get_event_loop().create_future()
+        gate.waiters.append(waiter)
+        gate.users[user_id] = gate.users.get(user_id, 0) + 1
+        await ctx.send(f'{ctx.author.mention}, you are #{len(gate.waiters)} in the queue for `#!{command_name}`.')
+        try:
+            with span('command queue', position=len(gate.waiters)):
+                await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():  # The invocation got a slot before it was cancelled
+                gate.release(user_id)
+            else:
+                waiter.cancel()
+                gate.remove_user(user_id)
+            raise
+    ctx.command_gate = gate
+    ctx.command_started = time.perf_counter()
+
+
+# Runs before every command, starts the trace of the invocation and lets the command in
+async def acquire_command(ctx):
+    ctx.trace_token = tracer.start_trace('command', f'#!{ctx.command.qualified_name}', user_id=ctx.author.id,
+                                         channel_id=ctx.channel.id)
+    try:
+        await admit_command(ctx)
+    except BaseException as error:  # The after invoke hook isn't called when this hook raises
+        tracer.finish_trace(ctx.trace_token, error)
+        raise
+
+
+# Runs after every command, even if it failed, records its run time, finishes its trace and frees the slot of the
+# command
+async def release_command(ctx):
+    started = getattr(ctx, 'command_started', None)
+    if started:
+        metrics.observe_command(ctx.command.qualified_name, time.perf_counter() - started, ctx.command_failed)
+    token = getattr(ctx, 'trace_token', None)
+    if token:
+        tracer.finish_trace(token, "the command failed" if ctx.command_failed else None)
+    gate = getattr(ctx, 'command_gate', None)
+    if gate:
+        gate.release(ctx.author.id)
+
+
+def setup_admission(bot):
+    for command_name, limits in DEFAULT_COMMAND_LIMITS.items():
+        Config.set_init(f'command-limits-{command_name}', limits)
+    bot.before_invoke(acquire_command)
+    bot.after_invoke(release_command)
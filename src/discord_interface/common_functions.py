@@ -1,13 +1,19 @@
 import re
+import asyncio
 import discord
 
 from discord_database.config import Config
 from discord_database.team import Team
 
-from github import Github
+from github import UnknownObjectException
 from github.NamedUser import NamedUser
 from github.Requester import Requester
 
+from github_database.github_repo import GithubRepo
+from github_interface.github_auth import get_token
+from github_interface.github_configuration import org_name, api_url, webhook_secret
+from github_interface.github_scheduler import github_call, scheduler
+
 
 async def get_gen_name(idea_name):
     if len(idea_name) > 95:
@@ -44,48 +50,72 @@ async def delete_from_running(bot, gen_name):
         await message.delete()
 
 
-async def delete_entire_team(bot, ctx: discord, team_name, github_token, org_name):
+# Deletes the team roles, channels, GitHub team and database row. The results are sent to the channel, which can be
+# a command channel or the channel of a job
+async def delete_entire_team(bot, guild: discord.Guild, channel, team_name):
     team: Team = Team.get(team_name)
     if not team:
-        return await ctx.send("Invalid team name.")
-    role = ctx.guild.get_role(team.role_id)
-    leader_role: discord.Role = ctx.guild.get_role(team.leader_role_id)
-
-    category = discord.utils.get(ctx.guild.categories, id=team.category_id)
-    if not category:
-        return await ctx.send(ctx.author.mention + ", invalid team name")
-
-    if role.permissions.administrator:
-        return await ctx.send(ctx.author.mention + ", you can't do that")
-
-    g = Github(github_token)
-    org = g.get_organization(org_name)
-    github_team = org.get_team_by_slug(team_name)
-    if not github_team:
-        return await ctx.send("Couldn't find the team on GitHub")
-
-    github_team.delete()
-    for channel in category.channels:
-        await channel.delete()
-    await category.delete()
-    await role.delete()
-    if leader_role.id != -1:
-        await leader_role.delete()
+        return await channel.send("Invalid team name.")
+    role = guild.get_role(team.role_id)
+    leader_role: discord.Role = guild.get_role(team.leader_role_id)
+
+    category = discord.utils.get(guild.categories, id=team.category_id)  # None if it was deleted by a previous run
+    if role and role.permissions.administrator:
+        return await channel.send("You can't delete the team of an administrator role")
+
+    def delete_github_team(g):
+        try:
+            g.get_organization(org_name).get_team_by_slug(team_name).delete()
+            return True
+        except UnknownObjectException:
+            return False
+
+    # The GitHub team and the channels are deleted at the same time, then the category and the roles, and the team row
+    # last. Each step skips what has already been deleted, so the deletion can be run again if it gets interrupted
+    github_team_deleted, *_ = await asyncio.gather(
+        github_call(delete_github_team),
+        *[delete_if_exists(channel) for channel in (category.channels if category else [])]
+    )
+    await asyncio.gather(delete_if_exists(category), delete_if_exists(role), delete_if_exists(leader_role),
+                         delete_from_running(bot, team_name))
     team.delete_team(team_name)
-    await delete_from_running(bot, team_name)
     try:
-        await ctx.send(f'Deleted the `{team_name}` team')
+        if not github_team_deleted:
+            await channel.send("Couldn't find the team on GitHub")
+        await channel.send(f'Deleted the `{team_name}` team')
     except discord.NotFound:
         return
 
 
-async def send_to_finished(bot, github_token, org_name, repo_id):
-    g = Github(github_token)
-    repo = g.get_repo(repo_id)
-    if not repo:
+# Deletes a Discord channel or role unless it has already been deleted
+async def delete_if_exists(discord_object):
+    if not discord_object:
+        return
+    try:
+        await discord_object.delete()
+    except discord.NotFound:
         return
 
-    gen_name = repo.name
+
+# Gets the name of a repository from the repositories index when the GitHub webhook keeps it up to date, or from
+# GitHub. Returns None if the repository was deleted
+async def get_repo_name(repo_id):
+    indexed_repo = GithubRepo.get(repo_id) if webhook_secret else None
+    if indexed_repo:
+        return indexed_repo.name
+    try:
+        repo = await github_call(lambda g: g.get_repo(repo_id))
+    except UnknownObjectException:
+        return None
+    if webhook_secret:  # The webhook only indexes the repositories that are created or changed after it was set up
+        GithubRepo.set(repo.id, repo.name)
+    return repo.name
+
+
+async def send_to_finished(bot, repo_id):
+    gen_name = await get_repo_name(repo_id)
+    if not gen_name:
+        return
 
     finished_channel_id = int(Config.get("finished-channel"))
     finished_channel = bot.get_channel(finished_channel_id)  # The channel to post the finished project
@@ -105,13 +135,14 @@ async def clear_messages_channel(bot, gen_name):
         await message.delete()
 
 
-def get_github_user_by_id(github_token, user_id: int):
-    requester = Requester(github_token, None, None, "https://api.github.com", 15, None, None, "PyGithub/Python", 30,
+def get_github_user_by_id(user_id: int):
+    requester = Requester(get_token(), None, None, api_url, 15, None, None, "PyGithub/Python", 30,
                           True, None)
     assert isinstance(user_id, (int, type(None)))
     headers, data = requester.requestJsonAndCheck(
         "GET", "/user/" + str(user_id)
     )
+    scheduler.update_from_headers(headers)
     return NamedUser(
         requester, headers, data, completed=True
     )
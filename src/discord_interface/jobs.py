@@ -0,0 +1,152 @@
+import asyncio
+
+import discord
+
+from discord_database.config import Config
+from discord_database.job import Job
+
+# The number of jobs that are run at the same time
+WORKERS = 2
+# How long the worker waits for new jobs before checking the queue again
+IDLE_TIME = 60
+
+job_handlers = {}  # The job kinds mapped to their handlers and the number of times they are retried
+running_jobs = {}  # The running job ids mapped to their tasks
+new_jobs = asyncio.Event()
+
+
+# Registers a coroutine as the handler of a job kind. The handler is called with the job, its guild, its channel, a
+# report coroutine that updates the job progress and the job arguments as keyword arguments. Only the jobs that are safe
+# to run twice should be retried
+def job_handler(kind, retries=0):
+    def register(handler):
+        job_handlers[kind] = (handler, retries)
+        return handler
+
+    return register
+
+
+# Queues a job and wakes up the workers. Unique jobs aren't queued again while a job of the same kind is active
+async def enqueue_job(ctx, kind, unique=False, **arguments):
+    if unique:
+        active_job = next((job for job in Job.get_active() if job.kind == kind), None)
+        if active_job:
+            return await ctx.send(f'Job `#{active_job.job_id}` ({kind}) is already {active_job.status}. '
+                                  f'Use `#!jobs` to see its progress.')
+    job = Job.add(kind, arguments, ctx.guild.id, ctx.channel.id, ctx.author.id)
+    new_jobs.set()
+    await ctx.send(f'Queued job `#{job.job_id}` ({kind}). Use `#!jobs` to see its progress.')
+    return job
+
+
+def cancel_job(job: Job):
+    task = running_jobs.get(job.job_id)
+    if task:
+        task.cancel()
+    Job.set_status(job, 'cancelled')
+
+
+# Runs a job and reports its progress in its channel. The channel can be deleted by the job itself (like a delete_team
+# job run from a channel of the team), the reports are sent to the bot channel then. A report that can't be sent
+# doesn't fail the job, so the job isn't retried for it
+async def run_job(bot, job: Job):
+    handler, retries = job_handlers[job.kind]
+    guild = bot.get_guild(job.guild_id)
+    channel = bot.get_channel(job.channel_id) or bot.get_channel(int(Config.get('bot-channel')))
+    progress_message = None
+
+    async def send(content):
+        nonlocal channel
+        try:
+            return await channel.send(content) if channel else None
+        except discord.NotFound:  # The job channel was deleted while the job was running
+            channel = bot.get_channel(int(Config.get('bot-channel')))
+            return await channel.send(content) if channel else None
+
+    async def report(progress):
+        nonlocal progress_message
+        Job.set_progress(job, progress)
+        content = f'Job `#{job.job_id}` ({job.kind}): {progress}'
+        try:
+            if progress_message:
+                try:
+                    return await progress_message.edit(content=content)
+                except discord.NotFound:  # The progress message was deleted, along with its channel maybe
+                    progress_message = None
+            progress_message = await send(content)
+        except discord.HTTPException as error:
+            print(f'Could not report the progress of job #{job.job_id}: {error}')
+
+    try:
+        await handler(job, guild, channel, report, **job.get_arguments())
+        Job.set_status(job, 'done')
+    except asyncio.CancelledError:
+        Job.set_status(job, 'cancelled')
+    except Exception as error:
+        if job.attempts < retries:
+            Job.retry(job, str(error))
+            new_jobs.set()
+        else:
+            Job.set_status(job, 'failed', str(error))
+            try:
+                await send(f'Job `#{job.job_id}` ({job.kind}) has failed: `{error}`')
+            except discord.HTTPException as send_error:
+                print(f'Could not report the failure of job #{job.job_id}: {send_error}')
+
+
+async def jobs_worker(bot):
+    while True:
+        new_jobs.clear()
+        job = Job.get_next()
+        if not job:
+            try:
+                await asyncio.wait_for(new_jobs.wait(), timeout=IDLE_TIME)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        Job.set_status(job, 'running')
+        if job.kind not in job_handlers:
+            Job.set_status(job, 'failed', 'Unknown job kind')
+            continue
+        # The job runs in its own task so that cancelling it doesn't stop the worker
+        task = bot.loop.create_task(run_job(bot, job))
+        running_jobs[job.job_id] = task
+        try:
+            await asyncio.gather(task, return_exceptions=True)
+        finally:
+            running_jobs.pop(job.job_id, None)
+
+
+# Queues the jobs that were running when the bot stopped again if their handler allows another attempt, which counts as
+# an attempt. The other jobs (like activity_check, which would warn the inactive members twice) are marked as failed,
+# and their channel is told. Returns the jobs that failed
+def recover_interrupted_jobs():
+    failed_jobs = []
+    for job in Job.get_running():
+        _, retries = job_handlers.get(job.kind, (None, 0))
+        if job.attempts < retries:
+            Job.retry(job, 'Interrupted by a restart')
+        else:
+            Job.set_status(job, 'failed', 'Interrupted by a restart')
+            failed_jobs.append(job)
+    return failed_jobs
+
+
+async def report_interrupted_jobs(bot, jobs):
+    for job in jobs:
+        channel = bot.get_channel(job.channel_id) or bot.get_channel(int(Config.get('bot-channel')))
+        if not channel:
+            continue
+        try:
+            await channel.send(f'Job `#{job.job_id}` ({job.kind}) was interrupted by a restart and was not run again. '
+                               f'Run the command again if needed.')
+        except discord.HTTPException as error:
+            print(f'Could not report the interruption of job #{job.job_id}: {error}')
+
+
+# Starts the job workers after recovering the jobs that were interrupted by a restart
+def start_jobs_workers(bot):
+    interrupted_jobs = recover_interrupted_jobs()
+    if interrupted_jobs:
+        bot.loop.create_task(report_interrupted_jobs(bot, interrupted_jobs))
+    return [bot.loop.create_task(jobs_worker(bot)) for _ in range(WORKERS)]
@@ -1,10 +1,11 @@
 import discord
-from github import Github, UnknownObjectException
+from github import UnknownObjectException
 
 from asyncio import TimeoutError
 
-from discord_interface.member_interface import github_token, org_name
 from discord_interface.common_functions import delete_entire_team, send_to_finished
+from github_interface.github_configuration import org_name
+from github_interface.github_scheduler import github_call
 
 from discord_database.team import Team
 
@@ -47,21 +48,23 @@ def setup_leader_interface(bot):
         except TimeoutError:  # If the user did not reply with a yes after 10 seconds
             await ctx.send("Will not mark that as finished")
         else:  # If the user replied with a yes
-            await delete_entire_team(bot, ctx, gen_name, github_token, org_name)
+            await delete_entire_team(bot, ctx.guild, ctx.channel, gen_name)
 
-        await send_to_finished(bot, github_token, org_name, team.repo_id)
+        await send_to_finished(bot, team.repo_id)
 
     @bot.command(hidden=True, brief="Leader command")
     async def add_repo(ctx, repo_name):
         team = await check_if_leader(ctx)
         if not team:
             return await you_are_not_leader(ctx)
-        g = Github(github_token)
-        org = g.get_organization(org_name)
-        try:
+        def add_team_repo(g):
+            org = g.get_organization(org_name)
             repo = org.get_repo(repo_name)
-            github_team = org.get_team(team.github_id)
-            github_team.add_to_repos(repo)
+            org.get_team(team.github_id).add_to_repos(repo)
+            return repo
+
+        try:
+            repo = await github_call(add_team_repo)
             team.set(
                 team.team_name, team.role_id, team.leader_role_id, team.category_id,
                 team.general_id, team.github_id, repo.id
@@ -1,4 +1,4 @@
-from os import path, environ
+from os import path
 from dotenv import load_dotenv
 
 import asyncio
@@ -7,16 +7,32 @@ from discord_database.config import Config
 from discord_database.team import Team
 from discord_database.user import User
 from discord_database.warn import Warn
+from discord_database.team_step import TeamStep
 
 import discord.ext.commands.errors
 
-from github import Github, UnknownObjectException
+from github import UnknownObjectException
 
 from datetime import datetime, timezone, timedelta
 import pytz
 
 from discord_interface.common_functions import get_gen_name, check_team_existence, clear_messages_channel, \
     get_github_user_by_id
+from github_interface.activity_functions import refresh_all_activities, refresh_activities_periodically
+from github_interface.github_configuration import org_name, webhook_secret
+from github_interface.github_scheduler import github_call
+from github_interface.invitation_queue import enqueue_invitation, invitations_worker
+
+from github_database.activity import Activity
+from github_database.github_team import GithubTeam
+from github_database.invitation import Invitation
+
+from discord_interface.admission import CommandLimited
+from discord_interface.jobs import job_handler, enqueue_job, start_jobs_workers
+from discord_interface.paginator import Paginator
+from listing_cache import invalidate_team, ALL_TEAMS
+from load_monitor import load_monitor
+from loop_watchdog import loop_watchdog
 
 # Set up .env path
 dotenv_path = path.join(path.dirname(__file__), '../../.env')
@@ -27,12 +43,16 @@ CHECK_MARK_EMOJI = '\U0001F973'
 RESTART_EMOJI = '\U0001F504'
 THUMBS_UP_EMOJI = '\N{THUMBS UP SIGN}'
 
-# GitHub data
-github_token = environ.get('GITHUB_TOKEN')
-org_name = environ.get('ORG_NAME')
+# The number of days after which a member who hasn't contributed to their team repository is considered inactive
+INACTIVITY_DAYS = 14
 
 # Bot data
 online_since_date = None
+activity_refresh_task = None
+invitations_task = None
+jobs_tasks = None
+load_monitor_task = None
+creating_teams = set()  # The names of the teams that are being created
 utc = pytz.UTC
 
 
@@ -82,55 +102,42 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
         await create_team(ctx.guild, team_name)
         await ctx.send(f'Created new team `{team_name}`')
 
-    # Used to check each member's activity by checking the difference between the current time and the
-    # start of the week of his latest contribution (Sunday). If the difference is more than 13 days the user gets warned
+    # Used to check each member's activity by checking the difference between the current time and their latest
+    # contribution to the team repository. If the difference is more than two weeks the user gets warned
     @bot.command(hidden=True, brief="Checks the members contribution activities")
     async def activity_check(ctx):
         if not ctx.author.guild_permissions.administrator:
             await ctx.message.delete()
             return await ctx.send(ctx.author.mention + ", you can't do that", delete_after=3.0)
+        await enqueue_job(ctx, 'activity_check', unique=True)
 
-        if datetime.now(tz=timezone.utc).strftime("%A") != "Saturday":  # If it isn't Saturday
-            return await ctx.send(ctx.author.mention + ", you can only do activity checks on Saturdays (UTC)")
+    @job_handler('activity_check')  # Not retried as the inactive members would be warned twice
+    async def run_activity_check(job, guild, channel, report):
+        await report("Refreshing the contributions...")
+        await refresh_all_activities()  # Only fetches the commits made since the last refresh
 
-        await ctx.send("Please wait...")
-
-        g = Github(github_token)
-        users = User.get_teams()  # The users in the database
         bot_channel_id = int(Config.get('bot-channel'))
         bot_channel = bot.get_channel(bot_channel_id)
+        inactivity_limit = datetime.utcnow() - timedelta(days=INACTIVITY_DAYS)
 
-        for user in users:
-            repo_id = user.team.repo_id
+        users_activity = Activity.get_users_activity()  # The users in the database and their last contributions
+        for i, (user, last_contribution) in enumerate(users_activity):
+            if i % 10 == 0:
+                await report(f'Checked {i}/{len(users_activity)} members...')
             gen_name = user.user_team
-            status = "inactive"
-
-            guild_user = ctx.guild.get_member(user.user_id)  # The user in the server
-            role = ctx.guild.get_role(user.team.role_id)  # The team role
-            repo = g.get_repo(repo_id)  # The team repository
-            stats_contributors = repo.get_stats_contributors()
-            if not repo or not role or not guild_user or not stats_contributors:
+            guild_user = guild.get_member(user.user_id)  # The user in the server
+            role = guild.get_role(user.team.role_id)  # The team role
+            if not role or not guild_user:
                 continue
 
-            for stat in stats_contributors:
-                if stat.author.id != user.user_github_id:
-                    continue
-                for week in stat.weeks:
-                    if week.c < 1:  # If there were no commits in this week
-                        continue
-                    current_utc = datetime.now(tz=timezone.utc)  # The current time in UTC
-                    commit_start_week = utc.localize(week.w)  # The commit start of the week (Sunday)
-                    time_difference = current_utc - commit_start_week
-                    day_difference = time_difference.days  # The time difference in days
-                    if day_difference < 16:  # If the user has committed in the past two weeks, continue
-                        status = 'active'
+            status = 'active' if last_contribution and last_contribution > inactivity_limit else 'inactive'
             # Check the status
             if status == 'inactive':
                 await warn_member(guild_user, f'Being inactive in the {gen_name} team')
 
             await bot_channel.send(f'Name: {guild_user.mention} | Team: **{gen_name}** | Status: **{status}**')
 
-        await ctx.send("Done.")
+        await report("Done.")
 
     # -------------------------------- Getting info --------------------------------
     # Show channels
@@ -168,32 +175,36 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
 
     @bot.command(brief="Shows all teams members and their GitHub usernames")
     async def list_members(ctx, team_name=''):
-        if team_name:  # If the user provided a team name
-            users = User.get_team(team_name)
-            title_name = team_name
-        else:  # If the user didn't provide a team name, show all teams
-            if not ctx.author.guild_permissions.administrator:
-                return await ctx.send(ctx.author.mention + ', only admins can list all the members, '
-                                                           'please use `#!list_members "team_name"`')
-            users = User.get_teams()
-            title_name = "Current users in teams"
-        await ctx.send("Please wait...")
+        if not team_name and not ctx.author.guild_permissions.administrator:
+            return await ctx.send(ctx.author.mention + ', only admins can list all the members, '
+                                                       'please use `#!list_members "team_name"`')
+
+        if not User.count(team_name):
+            return await ctx.send("There are currently no members in teams.")
+
+        # The members are fetched and rendered one page at a time, so any number of members can be listed
+        async def render(embed, users):
+            await add_members_fields(ctx.guild, embed, users)
+
+        title = team_name if team_name else "Current users in teams"
+        paginator = Paginator(bot, ctx, title, lambda: User.count(team_name),
+                              lambda offset, limit: User.get_page(offset, limit, team_name), render,
+                              cache_key=('members', team_name if team_name else ALL_TEAMS))
+        await paginator.start()
+
+    # Adds the members, their teams and their GitHub usernames to an embed
+    async def add_members_fields(guild, embed, users):
         users_str = ''
         teams_str = ''
         githubs_str = ''
-        embed = discord.Embed(title=title_name)
-
-        if not users:  # Happens when get_teams() function returns None
-            return await ctx.send("There are currently no members in teams.")
 
         for user in users:
-            guild = ctx.guild
             guild_user = guild.get_member(user.user_id)
             if not guild_user or not user.team:  # If the user has left the server or the team is still in creation
                 continue
             username = guild_user.name
             role = discord.utils.get(guild_user.roles, id=user.team.role_id)
-            github_user = get_github_user_by_id(github_token, user.user_github_id)
+            github_user = await github_call(lambda g: get_github_user_by_id(user.user_github_id))
 
             teams_str += "\n" + user.team.team_name
             github_username = github_user.name or github_user.login
@@ -208,25 +219,20 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
         embed.add_field(name="Username", value=users_str)
         embed.add_field(name="Team", value=teams_str)
         embed.add_field(name="Github username", value=githubs_str)
-        await ctx.send(embed=embed)
 
     @bot.command(brief="Shows a list of teams that you can join")
     async def list_teams(ctx):
-        await ctx.send("Please wait...")
-        g = Github(github_token)
-        org = g.get_organization(org_name)
-        teams = org.get_teams()
-        embed = discord.Embed(title="Use the any of the following commands to add yourself to a specific team")
-        for github_team in teams:
-            github_id = github_team.id
-            team: Team = Team.get(github_id=github_id)
-            if not team:  # If the team does not exist in the teams table
-                continue
-            embed.add_field(name=github_team.name, value=f'#!add_me "your github username" "{team.team_name}"')
-        if not embed.fields:
-            embed.title = "There are no teams available"
+        if not Team.count():
+            return await ctx.send("There are no teams available")
+
+        async def render(embed, teams):
+            for team in teams:
+                embed.add_field(name=team.team_name, value=f'#!add_me "your github username" "{team.team_name}"',
+                                inline=False)
 
-        await ctx.send(embed=embed)
+        paginator = Paginator(bot, ctx, "Use the any of the following commands to add yourself to a specific team",
+                              Team.count, Team.get_page, render)
+        await paginator.start()
 
     # -------------------------------- Supporting functions --------------------------------
     # A mathematical function that is used to change seconds into hours, minutes, seconds format
@@ -314,9 +320,8 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
 
     # Adds the team role to the user and his GitHub user name to the db
     async def add_github(guild, guild_user, github_user, gen_name):
-        g = Github(github_token)  # Logs into GitHub
         try:
-            github = g.get_user(github_user)  # Tries to find the user on GitHub
+            github = await github_call(lambda g: g.get_user(github_user))  # Tries to find the user on GitHub
             team: Team = Team.get(gen_name)
             if team:
                 role = guild.get_role(team.role_id)  # Finds the team role if the team exists in the database
@@ -345,8 +350,7 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
         else:
             role = discord.utils.get(member.roles, name=gen_name)
         try:
-            g = Github(github_token)
-            github_user = g.get_user(github_username)
+            github_user = await github_call(lambda g: g.get_user(github_username))
         except UnknownObjectException:
             return await channel.send("Invalid Github username.")
         if user.user_github_id == github_user.id:
@@ -434,8 +438,8 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
         elif add and not mention_message:
             message = await voting_channel.send(ctx.author.mention)
             return await message.add_reaction(THUMBS_UP_EMOJI)
-        # If the user wanted to be removed, remove the mention message
-        elif not add:
+        # If the user wanted to be removed, remove the mention message (unless on_member_update has already removed it)
+        elif not add and mention_message:
             await mention_message.delete()
 
     @bot.command(brief="Adds you to a team of your choice")
@@ -471,13 +475,12 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
             await ctx.send("Invalid GitHub username.")
 
         team: Team = Team.get(team_name)
-        g = Github(github_token)
-        org = g.get_organization(org_name)
-        github_team = org.get_team(team.github_id)
-        if not github_team:
+        try:
+            github_team = await github_call(lambda g: g.get_organization(org_name).get_team(team.github_id))
+        except UnknownObjectException:
             return await ctx.send(ctx.author.mention + ", an error has occurred while adding you to the team.")
-        await add_membership(ctx.author, team_name, github_team)
-        await ctx.send("Done")
+        await add_membership(ctx.author, team_name, github_team.id)
+        await ctx.send("Done. I will message you when your GitHub team invitation is sent")
         await manage_leader_voting(ctx, team_name)
 
     @bot.command(brief="Removes you from a team you are a member of")
@@ -493,19 +496,23 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
             await ctx.author.remove_roles(leader_role)
             await ctx.send(ctx.author.mention + ", I have removed your leadership role")
 
-        g = Github(github_token)
-        org = g.get_organization(org_name)
-        github_team = org.get_team(team.github_id)
-        if not github_team:
-            return await ctx.send(ctx.author.mention + ", couldn't find the team on GitHub")
         user: User = User.get(ctx.author.id, team_name)
         if not user:
             return await ctx.send(ctx.author.mention + ", couldn't find you in the database.")
         github_id = user.user_github_id
-        try:
-            github_user = get_github_user_by_id(github_token, github_id)
-            github_team.remove_membership(github_user)
+        Invitation.delete(team.github_id, github_id)  # In case the invitation hasn't been sent yet
 
+        def remove_membership(g):
+            try:
+                github_team = g.get_organization(org_name).get_team(team.github_id)
+            except UnknownObjectException:
+                return None
+            github_team.remove_membership(get_github_user_by_id(github_id))
+            return github_team
+
+        try:
+            if not await github_call(remove_membership):
+                return await ctx.send(ctx.author.mention + ", couldn't find the team on GitHub")
             await ctx.send(ctx.author.mention + ", I have removed you from the GitHub team")
         except UnknownObjectException:
             await ctx.send("There was a problem finding you on GitHub, perhaps you have changed your username?")
@@ -533,123 +540,170 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
             voting_message = await voting_channel.send(member.mention)
             await voting_message.add_reaction(THUMBS_UP_EMOJI)
 
-    async def create_category_channels(guild, gen_name):
-        team: Team = Team.get(gen_name)
-        if team:
-            role = guild.get_role(team.role_id)
-            leader_role = guild.get_role(team.role_id)
-        else:
+    # Runs a team creation step unless it has already been done. Each step records the id of what it has created, so a
+    # team creation which was interrupted resumes from the step it has stopped at. The exists predicate checks if what
+    # a step has created before still exists
+    async def run_team_step(gen_name, step, create, exists=None):
+        value = TeamStep.get(gen_name, step)
+        if value is not None and (not exists or exists(value)):
+            return value
+        value = await create()
+        TeamStep.set(gen_name, step, value)
+        return value
+
+    # Creates the team role and the leader role, the category and the channels. The steps that don't depend on each
+    # other run at the same time
+    async def create_discord_team(guild, gen_name):
+        created = {}  # The created objects by id, they only get cached in the guild after their creation events
+
+        def get_object(object_id):
+            return guild.get_role(object_id) or guild.get_channel(object_id) or created.get(object_id)
+
+        def keep(discord_object):
+            created[discord_object.id] = discord_object
+            return discord_object.id
+
+        async def create_role():
             role = discord.utils.get(guild.roles, name=gen_name)
+            if not role:  # Creates the team role
+                role = await guild.create_role(name=gen_name)
+            # Remove the role from the bot
+            await asyncio.gather(*[member.remove_roles(role) for member in role.members if member.bot])
+            await role.edit(hoist=True)  # Makes the team role show in the members list
+            return keep(role)
+
+        async def create_leader_role():
             leader_role = discord.utils.get(guild.roles, name="pl-" + gen_name)
+            if not leader_role:  # Creates the leader role
+                leader_role = await guild.create_role(name="pl-" + gen_name, color=discord.Colour(16711680))
+            return keep(leader_role)
 
-        if not role:  # Creates the team role
-            role = await guild.create_role(name=gen_name)
-
-        # Remove the role from the bot
-        if role.members:
-            for member in role.members:
-                if member.bot:
-                    await member.remove_roles(role)
-
-        if not leader_role:  # Creates the leader role
-            leader_role = await guild.create_role(name="pl-" + gen_name, color=discord.Colour(16711680))
-
-        await role.edit(hoist=True)  # Makes the team role show in the members list
+        role_id, leader_role_id = await asyncio.gather(
+            run_team_step(gen_name, 'role', create_role, exists=get_object),
+            run_team_step(gen_name, 'leader-role', create_leader_role, exists=get_object)
+        )
+        role = get_object(role_id)
 
         # Only the team role members will be able to view the channel
         overwrites = {role: discord.PermissionOverwrite(view_channel=True),
                       guild.default_role: discord.PermissionOverwrite(view_channel=False)}
 
-        # Tries to see if a category already exists with the team name
-        category = discord.utils.get(guild.categories, name=gen_name)
-        if not category:  # Creates the team category
-            category = await guild.create_category(gen_name, overwrites=overwrites)
-        else:
-            for channel in category.channels:
-                if channel.name != "general":
-                    continue
-                return channel, category, role, leader_role
-        text_channel = await guild.create_text_channel("general", overwrites=overwrites, category=category)
-        await guild.create_voice_channel("Collab room", overwrites=overwrites, category=category)
-        await text_channel.send(role.mention + " LET'S GO!!")
-        if not role.members:
-            return text_channel, category, role, leader_role
-        return text_channel, category, role, leader_role
+        async def create_category():
+            # Tries to see if a category already exists with the team name
+            category = discord.utils.get(guild.categories, name=gen_name)
+            if not category:  # Creates the team category
+                category = await guild.create_category(gen_name, overwrites=overwrites)
+            return keep(category)
+
+        category_id = await run_team_step(gen_name, 'category', create_category, exists=get_object)
+        category = get_object(category_id)
+
+        async def create_text_channel():
+            text_channel = discord.utils.get(category.text_channels, name="general")
+            if not text_channel:
+                text_channel = await guild.create_text_channel("general", overwrites=overwrites, category=category)
+                await text_channel.send(role.mention + " LET'S GO!!")
+            return keep(text_channel)
+
+        async def create_voice_channel():
+            voice_channel = category.voice_channels[0] if category.voice_channels else \
+                await guild.create_voice_channel("Collab room", overwrites=overwrites, category=category)
+            return keep(voice_channel)
+
+        text_channel_id, _ = await asyncio.gather(
+            run_team_step(gen_name, 'general-channel', create_text_channel, exists=get_object),
+            run_team_step(gen_name, 'voice-channel', create_voice_channel, exists=get_object)
+        )
+        return role, get_object(leader_role_id), category, get_object(text_channel_id)
 
-    # To add users to a GitHub team
-    async def add_membership(member, gen_name, team):
-        user: User = User.get(member.id, gen_name)
-        if not user:
-            return
-        try:
-            github_user = get_github_user_by_id(github_token, user.user_github_id)
-            team.add_membership(github_user, role="member")
-        except UnknownObjectException:
+    # Creates the GitHub team and the repository. The team and the repository are looked up by name instead of listing
+    # all the organization teams and repositories, the team is read from the index kept by the GitHub webhook first
+    async def create_github_team(gen_name):
+        def get_or_create_team(g):
+            org = g.get_organization(org_name)
             try:
-                await member.send(f'There has been a problem adding you to the GitHub team in the `{gen_name}` project,'
-                                  f' perhaps you have changed your GitHub username?')
-            except discord.Forbidden:
-                return
-
-    async def create_org_team(gen_name, team_members, org):
-        teams = org.get_teams()
-        if teams:  # If there are teams in the organization
-            for team in teams:
-                if team.name != gen_name:
-                    continue
-                # If there is a team with the same name
-                return team
-
-        team = org.create_team(gen_name, privacy="closed")
-        # If there are no role members
-        if not team_members:
-            return team
+                return org.get_team_by_slug(gen_name).id  # The team slug is the same as the generated name
+            except UnknownObjectException:
+                return org.create_team(gen_name, privacy="closed").id
 
-        for member in team_members:
-            await add_membership(member, gen_name, team)
+        async def get_github_team_id():
+            indexed_team = GithubTeam.get(slug=gen_name) if webhook_secret else None
+            return indexed_team.team_id if indexed_team else await github_call(get_or_create_team)
 
-        return team
+        github_team_id = await run_team_step(gen_name, 'github-team', get_github_team_id)
 
-    async def create_repo(org, team, gen_name):
-        repos = org.get_repos()
-        if repos:  # If there are repos in the organization
-            for repo in repos:
-                if repo.name != gen_name:
-                    continue
-                # If a repository already exists for this idea
-                team.add_to_repos(repo)
-                return repo
-
-        repo = org.create_repo(gen_name, private=False)
-        team.add_to_repos(repo)
-        return repo
+        def get_or_create_repo(g):
+            org = g.get_organization(org_name)
+            try:
+                repo = org.get_repo(gen_name)  # If a repository already exists for this idea
+            except UnknownObjectException:
+                repo = org.create_repo(gen_name, private=False)
+            org.get_team(github_team_id).add_to_repos(repo)
+            return repo.id
+
+        repo_id = await run_team_step(gen_name, 'repo', lambda: github_call(get_or_create_repo))
+        return github_team_id, repo_id
+
+    # To add users to a GitHub team. The invitations are sent by the invitations worker which tells the members when
+    # their invitations are sent
+    async def add_membership(member, gen_name, team_id):
+        user: User = User.get(member.id, gen_name)
+        if not user:
+            return
+        enqueue_invitation(member.id, gen_name, team_id, user.user_github_id)
 
-    async def notify_about_team(repo, team, text_channel: discord.TextChannel):
+    async def notify_about_team(gen_name, text_channel: discord.TextChannel):
         running_channel_id = int(Config.get('running-channel'))
         running_channel = bot.get_channel(running_channel_id)
-        embed = discord.Embed(title=team.name)
-        await text_channel.send(f'https://github.com/orgs/{org_name}/teams/{team.name}')
-        await text_channel.send(f'https://github.com/{org_name}/{repo.name}')
+        embed = discord.Embed(title=gen_name)
+        await text_channel.send(f'https://github.com/orgs/{org_name}/teams/{gen_name}')
+        await text_channel.send(f'https://github.com/{org_name}/{gen_name}')
         await running_channel.send(f'A new team has been created!\n'
-                                   f'https://github.com/{org_name}/{repo.name}\n'
-                                   f'Please use `#!add_me "your Github username" "{team.name}"` to be added.',
+                                   f'https://github.com/{org_name}/{gen_name}\n'
+                                   f'Please use `#!add_me "your Github username" "{gen_name}"` to be added.',
                                    embed=embed)
 
-    # The team creation process
+    # The team creation process. The Discord and the GitHub parts run at the same time
     async def create_team(guild, gen_name):
+        if gen_name in creating_teams:  # If the team creation is already running
+            return
+        creating_teams.add(gen_name)
+        try:
+            await run_team_creation(guild, gen_name)
+        finally:
+            creating_teams.discard(gen_name)
+
+    async def run_team_creation(guild, gen_name):
+        TeamStep.set(gen_name, 'guild', guild.id)  # Used to resume the creation after a restart
+        (role, leader_role, category, text_channel), (github_team_id, repo_id) = await asyncio.gather(
+            create_discord_team(guild, gen_name),
+            create_github_team(gen_name)
+        )
 
-        text_channel, category, role, leader_role = await create_category_channels(guild, gen_name)
+        async def add_memberships():
+            for member in role.members:
+                if not member.bot:
+                    await add_membership(member, gen_name, github_team_id)
+            return len(role.members)
 
-        team_members = role.members
+        await run_team_step(gen_name, 'memberships', add_memberships)
+        Team.set(gen_name, role.id, leader_role.id, category.id, text_channel.id, github_team_id, repo_id)
 
-        g = Github(github_token)
-        org = g.get_organization(org_name)
-        github_team = await create_org_team(gen_name, team_members, org)
+        async def announce_team():
+            await asyncio.gather(notify_about_team(gen_name, text_channel), vote_for_leader(gen_name, guild, category))
+            return 1
 
-        repo = await create_repo(org, github_team, gen_name)
-        Team.set(gen_name, role.id, leader_role.id, category.id, text_channel.id, github_team.id, repo.id)
-        await notify_about_team(repo, github_team, text_channel)
-        await vote_for_leader(gen_name, guild, category)
+        await run_team_step(gen_name, 'announced', announce_team)
+        TeamStep.delete_team(gen_name)  # The team creation has ended
+
+    # Resumes the team creations that were interrupted by a restart
+    async def resume_team_creations():
+        for gen_name in TeamStep.get_unfinished():
+            guild = bot.get_guild(TeamStep.get(gen_name, 'guild'))
+            if not guild:
+                continue
+            print(f'Resuming the creation of the {gen_name} team...')
+            await create_team(guild, gen_name)
 
     async def kick_member(member, reason):
         guild = member.guild
@@ -878,6 +932,7 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
 
         # Trial count
         while trials <= 3:
+            await load_monitor.defer('countdown announcement')
             # Wait for 14 days
             msg = await idea_channel.fetch_message(message_id)
             days, seconds = await get_time_to_wait(msg, voting=True)
@@ -955,9 +1010,19 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
     @bot.event
     async def on_ready():
         print('I\'m alive, my dear human :)')
-        global online_since_date
+        global online_since_date, activity_refresh_task, invitations_task, jobs_tasks, load_monitor_task
         online_since_date = datetime.now(tz=timezone.utc)
+        if not load_monitor_task:
+            load_monitor_task = bot.loop.create_task(load_monitor.run())
+        loop_watchdog.start(bot.loop)  # Only starts once
+        if not activity_refresh_task:  # on_ready can be called multiple times on reconnects
+            activity_refresh_task = bot.loop.create_task(refresh_activities_periodically())
+        if not invitations_task:
+            invitations_task = bot.loop.create_task(invitations_worker(bot))
+        if not jobs_tasks:
+            jobs_tasks = start_jobs_workers(bot)
         await check_unfinished_ideas()
+        await resume_team_creations()
         print("Done.")
 
     # Watch for reaction add
@@ -971,6 +1036,8 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
         if reaction.channel_id != idea_id and reaction.channel_id != overview_id:
             # Makes sure the reaction added is in the ideas channel or the overview channel
             return
+        if reaction.emoji.name not in (THUMBS_UP_EMOJI, RESTART_EMOJI):
+            await load_monitor.defer('reaction cleanup')  # The other reactions get removed once the bot isn't busy
         if reaction.channel_id == idea_id:
             message = await idea_channel.fetch_message(reaction.message_id)
         else:
@@ -996,6 +1063,12 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
         else:  # If it is another emoji, remove the reaction
             await message.remove_reaction(reaction.emoji, reaction.member)
 
+    # Invalidates the members listings when the roles of a member change, as they show the members who left their teams
+    @bot.listen()
+    async def on_member_update(before, after):
+        if before.roles != after.roles:
+            invalidate_team()
+
     # Watch messages addition to check for sent GitHub accounts
     @bot.event
     async def on_message(message):
@@ -1067,6 +1140,8 @@ def setup_member_interface(bot: discord.ext.commands.Bot):
     async def on_command_error(ctx, error):
         if isinstance(error, discord.ext.commands.CommandOnCooldown):
             await ctx.send(f'You can only use this command again after `{str(round(error.retry_after))}` seconds.')
+        elif isinstance(error, CommandLimited):
+            await ctx.send(str(error))
         elif isinstance(error, discord.ext.commands.CommandNotFound):
             await ctx.send(f'Unknown command: `{ctx.message.content}`')
         elif isinstance(error, discord.ext.commands.ExpectedClosingQuoteError):
@@ -0,0 +1,111 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from github import UnknownObjectException
+
+from discord_database.team import Team
+from discord_database.user import User
+from github_database.github_membership import GithubMembership
+from github_database.invitation import Invitation
+from github_interface.github_configuration import org_name
+from github_interface.github_scheduler import github_call, BULK
+from github_interface.invitation_queue import enqueue_invitation
+
+# The number of teams that are reconciled at the same time
+RECONCILE_CONCURRENCY = 4
+# GitHub invitations expire after a week, the members who didn't accept theirs are invited again
+INVITATION_EXPIRY = timedelta(days=7)
+
+
+# The changes that make the Discord team role, the users table and the GitHub team agree. The team role is the source of
+# truth: the members who have it must be in the users table and in the GitHub team, and nobody else
+class TeamDiff:
+    def __init__(self, team_name):
+        self.team_name = team_name
+        self.to_invite = {}  # The Discord ids of the members to add to the GitHub team mapped to their GitHub ids
+        self.to_remove = set()  # The GitHub ids of the GitHub team members who don't have the team role
+        self.rows_to_delete = set()  # The Discord ids of the users rows whose members don't have the team role
+        self.missing_rows = set()  # The Discord ids of the members whose GitHub username is unknown, fixed by #!add_me
+        self.error = None
+
+    def is_empty(self):
+        return not (self.to_invite or self.to_remove or self.rows_to_delete or self.missing_rows or self.error)
+
+    def describe(self):
+        if self.error:
+            return f'`{self.team_name}`: {self.error}'
+        changes = []
+        if self.to_invite:
+            changes.append(f'invite {len(self.to_invite)} member(s) to the GitHub team')
+        if self.to_remove:
+            changes.append(f'remove {len(self.to_remove)} GitHub user(s) from the GitHub team')
+        if self.rows_to_delete:
+            changes.append(f'delete {len(self.rows_to_delete)} user(s) who left the team')
+        if self.missing_rows:
+            mentions = ' '.join(f'<@{user_id}>' for user_id in self.missing_rows)
+            changes.append(f'{mentions} must use #!add_me to give their GitHub username')
+        return f'`{self.team_name}`: ' + ', '.join(changes)
+
+
+# Compares the three sides of a team, fetching each one in bulk: the role members from the Discord cache, the users rows
+# with one query and the GitHub team members with a single GitHub request. The GitHub removals are done in that same
+# request unless this is a dry run
+async def reconcile_team(guild, team: Team, dry_run):
+    diff = TeamDiff(team.team_name)
+    role = guild.get_role(team.role_id)
+    if not role:  # The team gets deleted by the reconciliation of the database
+        return diff
+
+    role_ids = {member.id for member in role.members if not member.bot}
+    rows = {user.user_id: user.user_github_id for user in User.get_team(team.team_name) or []}
+    awaiting = Invitation.get_awaiting(team.github_id, datetime.utcnow() - INVITATION_EXPIRY)
+    wanted_ids = {rows[user_id] for user_id in role_ids & rows.keys()}
+    diff.rows_to_delete = rows.keys() - role_ids
+    diff.missing_rows = role_ids - rows.keys()
+
+    def sync_github_team(g):
+        github_team = g.get_organization(org_name).get_team(team.github_id)
+        members = {member.id: member for member in github_team.get_members()}
+        maintainers = {member.id for member in github_team.get_members(role="maintainer")}
+        to_remove = members.keys() - maintainers - wanted_ids  # The maintainers (like the bot account) are kept
+        if not dry_run:
+            for github_id in to_remove:
+                github_team.remove_membership(members[github_id])
+        return set(members.keys()), to_remove
+
+    try:
+        github_ids, diff.to_remove = await github_call(sync_github_team, priority=BULK)
+    except UnknownObjectException:
+        diff.error = "the GitHub team doesn't exist anymore"
+        return diff
+    diff.to_invite = {user_id: rows[user_id] for user_id in role_ids & rows.keys()
+                      if rows[user_id] not in github_ids and rows[user_id] not in awaiting}
+
+    if dry_run:
+        return diff
+    GithubMembership.set_team(team.github_id, github_ids - diff.to_remove)
+    for user_id in diff.rows_to_delete:
+        Invitation.delete(team.github_id, rows[user_id])
+        User.delete(user_id, team.team_name)
+    for user_id, github_id in diff.to_invite.items():
+        enqueue_invitation(user_id, team.team_name, team.github_id, github_id)
+    return diff
+
+
+# Reconciles all the teams, RECONCILE_CONCURRENCY at a time, and returns the diffs of the teams that weren't in sync
+async def reconcile_all_teams(guild, dry_run, report=None):
+    teams = Team.get_all() or []
+    semaphore = asyncio.Semaphore(RECONCILE_CONCURRENCY)
+    done = 0
+
+    async def reconcile(team):
+        nonlocal done
+        async with semaphore:
+            diff = await reconcile_team(guild, team, dry_run)
+        done += 1
+        if report and done % 10 == 0:
+            await report(f'Reconciled {done}/{len(teams)} teams...')
+        return diff
+
+    diffs = await asyncio.gather(*[reconcile(team) for team in teams])
+    return [diff for diff in diffs if not diff.is_empty()]
@@ -0,0 +1,84 @@
+import asyncio
+import discord
+
+from listing_cache import listings
+
+# Used emojis
+PREVIOUS_EMOJI = '◀'
+NEXT_EMOJI = '▶'
+
+# The number of rows shown in a page, small enough for a page to fit in the 1024 characters of an embed field
+PAGE_SIZE = 10
+# How long the paginator waits for a page turn before removing its controls
+PAGE_TIMEOUT = 120
+
+
+# Shows a listing one page at a time in a single message that gets edited when the author reacts with the previous
+# and next emojis. Only the rows of the shown page are fetched and kept in memory:
+# - count() returns the number of rows of the listing
+# - fetch(offset, limit) returns the rows of a page (like a database query with an offset and a limit)
+# - render(embed, rows) is a coroutine that adds the rows to the embed of the page
+# The rendered pages are cached in the listings cache under cache_key (a (kind, key) tuple) if it is given
+class Paginator:
+    def __init__(self, bot, ctx, title, count, fetch, render, cache_key=None, page_size=PAGE_SIZE):
+        self.bot = bot
+        self.ctx = ctx
+        self.title = title
+        self.fetch = fetch
+        self.render = render
+        self.cache_key = cache_key
+        self.page_size = page_size
+        self.pages = max(1, -(-count() // page_size))  # Ceil division
+        self.page = 0
+        self.message = None
+
+    async def get_embed(self, page):
+        if self.cache_key:
+            kind, key = self.cache_key
+            cached_embed = listings.get(kind, (key, page))
+            if cached_embed:
+                return discord.Embed.from_dict(cached_embed)
+
+        embed = discord.Embed(title=self.title)
+        await self.render(embed, self.fetch(page * self.page_size, self.page_size))
+        embed.set_footer(text=f'Page {page + 1}/{self.pages}')
+
+        if self.cache_key:
+            listings.set(kind, (key, page), embed.to_dict())
+        return embed
+
+    # Sends the first page, the pages are then turned in the background so that the command doesn't keep running
+    async def start(self):
+        self.message = await self.ctx.send(embed=await self.get_embed(self.page))
+        if self.pages == 1:
+            return
+
+        await self.message.add_reaction(PREVIOUS_EMOJI)
+        await self.message.add_reaction(NEXT_EMOJI)
+        asyncio.ensure_future(self.turn_pages())
+
+    # Turns the pages until the author stops reacting for PAGE_TIMEOUT seconds
+    async def turn_pages(self):
+        def check(reaction, user):
+            return reaction.message.id == self.message.id and user.id == self.ctx.author.id and \
+                   str(reaction.emoji) in (PREVIOUS_EMOJI, NEXT_EMOJI)
+
+        while True:
+            try:
+                reaction, user = await self.bot.wait_for('reaction_add', check=check, timeout=PAGE_TIMEOUT)
+            except asyncio.TimeoutError:
+                break
+
+            try:  # Remove the reaction so that the author can react again, requires the Manage Messages permission
+                await self.message.remove_reaction(reaction.emoji, user)
+            except discord.Forbidden:
+                pass
+
+            step = 1 if str(reaction.emoji) == NEXT_EMOJI else -1
+            self.page = (self.page + step) % self.pages
+            await self.message.edit(embed=await self.get_embed(self.page))
+
+        try:
+            await self.message.clear_reactions()
+        except discord.Forbidden:
+            pass
@@ -0,0 +1,96 @@
+import asyncio
+
+import discord.ext.commands
+
+from discord_database.config import Config
+from discord_database.team import Team
+from discord_database.user import User
+from load_monitor import load_monitor
+
+sweep_task = None
+
+
+# Deletes the leader voting message that mentions a member, so they stop being a leader candidate
+async def remove_leader_candidate(guild, team: Team, user_id):
+    if team.voting_id == -1:
+        return
+    voting_channel = guild.get_channel(team.voting_id)
+    if not voting_channel:
+        return
+    async for message in voting_channel.history(limit=None):
+        if message.author.bot and message.raw_mentions[:1] == [user_id]:
+            try:
+                await message.delete()
+            except discord.NotFound:  # remove_me removes the candidate too
+                pass
+
+
+# Removes from the database what doesn't exist in the guild anymore: the teams whose roles were deleted, the voting
+# channels that were deleted and the users who left the server. Only the ids the database refers to are looked up in
+# the guild cache, so the clean up doesn't go through all the members of the guild. Returns the number of deleted teams
+# and users
+def reconcile_database(guild):
+    deleted_teams = 0
+    for team in Team.get_all() or []:
+        if not guild.get_role(team.role_id):
+            Team.delete_team(team.team_name)
+            deleted_teams += 1
+        elif team.voting_id != -1 and not guild.get_channel(team.voting_id):
+            Team.delete_voting_channel(team.team_name)
+
+    left_user_ids = {user_id for user_id in User.get_user_ids() if not guild.get_member(user_id)}
+    for user_id in left_user_ids:
+        User.delete_user(user_id)
+    return deleted_teams, len(left_user_ids)
+
+
+# Reconciles the database with each guild, which catches the events that were missed (while the bot was offline for
+# example)
+async def sweep_periodically(bot):
+    while True:
+        await asyncio.sleep(int(Config.get('reconciliation-sweep-time') or 3600))
+        await load_monitor.defer('reconciliation sweep')
+        for guild in bot.guilds:
+            deleted_teams, deleted_users = reconcile_database(guild)
+            if deleted_teams or deleted_users:
+                print(f'Reconciliation sweep: deleted {deleted_teams} team(s) and {deleted_users} user(s) '
+                      f'of {guild.name}')
+
+
+# Keeps the teams and the users tables up to date as the members, the roles and the channels change
+def setup_reconciliation(bot: discord.ext.commands.Bot):
+    @bot.listen()
+    async def on_ready():
+        global sweep_task
+        if not sweep_task:  # on_ready can be called multiple times on reconnects
+            for guild in bot.guilds:  # Catches up with what happened while the bot was offline
+                reconcile_database(guild)
+            sweep_task = bot.loop.create_task(sweep_periodically(bot))
+
+    @bot.listen()
+    async def on_member_remove(member):
+        teams = [user.team for user in User.get_teams_of(member.id) if user.team]
+        User.delete_user(member.id)
+        for team in teams:
+            await remove_leader_candidate(member.guild, team, member.id)
+
+    # The users rows are kept when a member loses a team role, so that the members listings show them as [LEFT], but
+    # they aren't leader candidates anymore
+    @bot.listen()
+    async def on_member_update(before, after):
+        for role in set(before.roles) - set(after.roles):
+            team = Team.get(role_id=role.id)
+            if team:
+                await remove_leader_candidate(after.guild, team, after.id)
+
+    @bot.listen()
+    async def on_guild_role_delete(role):
+        team = Team.get(role_id=role.id)
+        if team:
+            Team.delete_team(team.team_name)
+
+    @bot.listen()
+    async def on_guild_channel_delete(channel):
+        for team in Team.get_all() or []:
+            if team.voting_id == channel.id:
+                Team.delete_voting_channel(team.team_name)
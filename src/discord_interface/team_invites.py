@@ -0,0 +1,39 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import discord.ext.commands
+
+from discord_database.config import Config
+from discord_database.team_invite import TeamInvite
+
+channel_locks = {}  # The channel ids mapped to a lock, so two posts made at once don't both create an invite
+
+
+# Gets the invite of a team channel, creating it the first time. The invite is checked every invite-check-time seconds
+# with the listing of the channel invites, which also gives the number of members who joined through it, and it is
+# only created again if it was revoked
+async def get_team_invite(channel: discord.TextChannel, team_name) -> TeamInvite:
+    lock = channel_locks.setdefault(channel.id, asyncio.Lock())
+    async with lock:
+        team_invite = TeamInvite.get(channel.id)
+        if team_invite:
+            check_time = timedelta(seconds=int(Config.get('invite-check-time')))
+            if team_invite.checked_at + check_time > datetime.utcnow():
+                return team_invite
+            try:
+                invite = discord.utils.get(await channel.invites(), code=team_invite.code)
+            except discord.HTTPException:  # The invite is checked again next time
+                return team_invite
+            if invite:
+                TeamInvite.set_uses(team_invite, invite.uses)
+                return team_invite
+
+        invite = await channel.create_invite(max_age=0, reason=f'Reddit posts of {team_name}')
+        return TeamInvite.set(channel.id, team_name, invite.code, invite.url)
+
+
+def setup_team_invites(bot: discord.ext.commands.Bot):
+    # Forgets the revoked invites right away so the next post doesn't use them
+    @bot.listen()
+    async def on_invite_delete(invite: discord.Invite):
+        TeamInvite.delete_code(invite.code)
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, and_
+
+from db import Base, session, engine
+from discord_database.team import Team
+from discord_database.user import User
+
+
+# The activity model: the last time a GitHub user has contributed to a certain repository
+class Activity(Base):
+    __tablename__ = 'activities'
+
+    unique_id = Column(Integer, primary_key=True)
+    github_id = Column(BigInteger)
+    repo_id = Column(BigInteger)
+    last_contribution = Column(DateTime)  # In UTC
+
+    # Constructor and str
+    def __init__(self, github_id, repo_id, last_contribution):
+        self.github_id = github_id
+        self.repo_id = repo_id
+        self.last_contribution = last_contribution
+
+    def __repr__(self):
+        return f'<Activity(github_id={self.github_id}, repo_id={self.repo_id}, ' \
+               f'last_contribution={self.last_contribution})>'
+
+    # Static interface
+    @staticmethod
+    def get(github_id, repo_id):
+        activity = session.query(Activity).filter_by(github_id=github_id).filter_by(repo_id=repo_id).first()
+        return activity if activity else None
+
+    @staticmethod
+    def set(github_id, repo_id, last_contribution, commit=True):  # Only moves the last contribution forward
+        activity = Activity.get(github_id, repo_id)
+        if activity and activity.last_contribution >= last_contribution:
+            return
+        elif activity:
+            activity.last_contribution = last_contribution
+        else:
+            activity = Activity(github_id, repo_id, last_contribution)
+            session.add(activity)
+
+        if commit:
+            session.commit()
+
+    @staticmethod
+    def get_users_activity():  # Gets each user in a team along with their last contribution to the team repository
+        return session.query(User, Activity.last_contribution).join(User.team).outerjoin(
+            Activity, and_(Activity.github_id == User.user_github_id, Activity.repo_id == Team.repo_id)
+        ).all()
+
+    @staticmethod
+    def delete_repo(repo_id):
+        session.query(Activity).filter_by(repo_id=repo_id).delete()
+        session.commit()
+
+
+Base.metadata.create_all(engine)
@@ -0,0 +1,47 @@
+from sqlalchemy import Column, BigInteger, DateTime
+
+from db import Base, session, engine
+
+
+# The activity cursor model: the time up to which the contributions of a repository were fetched
+class ActivityCursor(Base):
+    __tablename__ = 'activity_cursors'
+
+    repo_id = Column(BigInteger, primary_key=True)
+    since = Column(DateTime)  # In UTC
+
+    # Constructor and str
+    def __init__(self, repo_id, since):
+        self.repo_id = repo_id
+        self.since = since
+
+    def __repr__(self):
+        return f'<ActivityCursor(repo_id={self.repo_id}, since={self.since})>'
+
+    # Static interface
+    @staticmethod
+    def get(repo_id):
+        cursor = session.query(ActivityCursor).filter_by(repo_id=repo_id).first()
+        return cursor.since if cursor else None
+
+    @staticmethod
+    def set(repo_id, since):
+        cursor = session.query(ActivityCursor).filter_by(repo_id=repo_id).first()
+
+        if cursor:
+            cursor.since = since
+        else:
+            cursor = ActivityCursor(repo_id, since)
+            session.add(cursor)
+
+        session.commit()
+
+    @staticmethod
+    def delete(repo_id):
+        cursor = session.query(ActivityCursor).filter_by(repo_id=repo_id).first()
+        if cursor:
+            session.delete(cursor)
+            session.commit()
+
+
+Base.metadata.create_all(engine)
@@ -0,0 +1,64 @@
+from sqlalchemy import Column, Integer, BigInteger
+
+from db import Base, session, engine
+
+
+# The GitHub membership model: an index of the members of each organization team that is kept up to date by the GitHub
+# webhook
+class GithubMembership(Base):
+    __tablename__ = 'github_memberships'
+
+    unique_id = Column(Integer, primary_key=True)
+    team_id = Column(BigInteger)
+    github_id = Column(BigInteger)
+
+    # Constructor and str
+    def __init__(self, team_id, github_id):
+        self.team_id = team_id
+        self.github_id = github_id
+
+    def __repr__(self):
+        return f'<GithubMembership(team_id={self.team_id}, github_id={self.github_id})>'
+
+    # Static interface
+    @staticmethod
+    def get(team_id, github_id):
+        membership = session.query(GithubMembership).filter_by(team_id=team_id).filter_by(github_id=github_id).first()
+        return membership if membership else None
+
+    @staticmethod
+    def get_team(team_id):  # Gets the GitHub ids of the members of a team
+        memberships = session.query(GithubMembership).filter_by(team_id=team_id).all()
+        return {membership.github_id for membership in memberships}
+
+    @staticmethod
+    def set(team_id, github_id):
+        if GithubMembership.get(team_id, github_id):
+            return
+        session.add(GithubMembership(team_id, github_id))
+        session.commit()
+
+    @staticmethod
+    def set_team(team_id, github_ids):  # Replaces the members of a team in the index
+        indexed_ids = GithubMembership.get_team(team_id)
+        for github_id in github_ids - indexed_ids:
+            session.add(GithubMembership(team_id, github_id))
+        if indexed_ids - github_ids:
+            session.query(GithubMembership).filter_by(team_id=team_id) \
+                .filter(GithubMembership.github_id.in_(indexed_ids - github_ids)).delete(synchronize_session=False)
+        session.commit()
+
+    @staticmethod
+    def delete(team_id, github_id):
+        membership = GithubMembership.get(team_id, github_id)
+        if membership:
+            session.delete(membership)
+            session.commit()
+
+    @staticmethod
+    def delete_team(team_id):
+        session.query(GithubMembership).filter_by(team_id=team_id).delete()
+        session.commit()
+
+
+Base.metadata.create_all(engine)
@@ -0,0 +1,50 @@
+from sqlalchemy import Column, String, BigInteger
+
+from db import Base, session, engine
+
+
+# The GitHub repository model: an index of the organization repositories that is kept up to date by the GitHub webhook
+class GithubRepo(Base):
+    __tablename__ = 'github_repos'
+
+    repo_id = Column(BigInteger, primary_key=True)
+    name = Column(String)
+
+    # Constructor and str
+    def __init__(self, repo_id, name):
+        self.repo_id = repo_id
+        self.name = name
+
+    def __repr__(self):
+        return f'<GithubRepo(repo_id={self.repo_id}, name={self.name})>'
+
+    # Static interface
+    @staticmethod
+    def get(repo_id: int = None, name: str = None):
+        if repo_id:
+            repo = session.query(GithubRepo).filter_by(repo_id=repo_id).first()
+        else:
+            repo = session.query(GithubRepo).filter_by(name=name).first()
+        return repo if repo else None
+
+    @staticmethod
+    def set(repo_id, name):
+        repo = GithubRepo.get(repo_id)
+
+        if repo:
+            repo.name = name
+        else:
+            repo = GithubRepo(repo_id, name)
+            session.add(repo)
+
+        session.commit()
+
+    @staticmethod
+    def delete(repo_id):
+        repo = GithubRepo.get(repo_id)
+        if repo:
+            session.delete(repo)
+            session.commit()
+
+
+Base.metadata.create_all(engine)
@@ -0,0 +1,59 @@
+from sqlalchemy import Column, String, BigInteger
+
+from db import Base, session, engine
+
+
+# The GitHub team model: an index of the organization teams that is kept up to date by the GitHub webhook
+class GithubTeam(Base):
+    __tablename__ = 'github_teams'
+
+    team_id = Column(BigInteger, primary_key=True)
+    name = Column(String)
+    slug = Column(String)
+
+    # Constructor and str
+    def __init__(self, team_id, name, slug):
+        self.team_id = team_id
+        self.name = name
+        self.slug = slug
+
+    def __repr__(self):
+        return f'<GithubTeam(team_id={self.team_id}, name={self.name}, slug={self.slug})>'
+
+    # Static interface
+    @staticmethod
+    def get(team_id: int = None, name: str = None, slug: str = None):
+        if team_id:
+            team = session.query(GithubTeam).filter_by(team_id=team_id).first()
+        elif slug:
+            team = session.query(GithubTeam).filter_by(slug=slug).first()
+        else:
+            team = session.query(GithubTeam).filter_by(name=name).first()
+        return team if team else None
+
+    @staticmethod
+    def get_all():
+        return session.query(GithubTeam).all()
+
+    @staticmethod
+    def set(team_id, name, slug):
+        team = GithubTeam.get(team_id)
+
+        if team:
+            team.name = name
+            team.slug = slug
+        else:
+            team = GithubTeam(team_id, name, slug)
+            session.add(team)
+
+        session.commit()
+
+    @staticmethod
+    def delete(team_id):
+        team = GithubTeam.get(team_id)
+        if team:
+            session.delete(team)
+            session.commit()
+
+
+Base.metadata.create_all(engine)
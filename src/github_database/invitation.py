@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Boolean
+
+from db import Base, session, engine
+
+
+# The invitation model: a pending, sent or failed addition of a member to a GitHub team
+class Invitation(Base):
+    __tablename__ = 'invitations'
+
+    unique_id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger)  # The Discord id of the member
+    team_name = Column(String)
+    github_team_id = Column(BigInteger)
+    github_id = Column(BigInteger)
+    status = Column(String)  # pending, sent or failed
+    attempts = Column(Integer)
+    next_attempt = Column(DateTime)  # In UTC
+    sent_at = Column(DateTime)  # In UTC
+    notified = Column(Boolean)  # If the member was told that the invitation was sent
+
+    # Constructor and str
+    def __init__(self, user_id, team_name, github_team_id, github_id):
+        self.user_id = user_id
+        self.team_name = team_name
+        self.github_team_id = github_team_id
+        self.github_id = github_id
+        self.status = 'pending'
+        self.attempts = 0
+        self.next_attempt = datetime.utcnow()
+        self.sent_at = None
+        self.notified = False
+
+    def __repr__(self):
+        return f'<Invitation(user_id={self.user_id}, team_name={self.team_name}, github_id={self.github_id}, ' \
+               f'status={self.status})>'
+
+    # Static interface
+    @staticmethod
+    def get(github_team_id, github_id):
+        invitation = session.query(Invitation).filter_by(github_team_id=github_team_id) \
+            .filter_by(github_id=github_id).first()
+        return invitation if invitation else None
+
+    @staticmethod
+    def enqueue(user_id, team_name, github_team_id, github_id):  # Queues an invitation unless one is already pending
+        invitation = Invitation.get(github_team_id, github_id)
+        if invitation and invitation.status == 'pending':
+            return
+        elif invitation:  # Sent or failed before, the member is invited again
+            invitation.user_id = user_id
+            invitation.status = 'pending'
+            invitation.attempts = 0
+            invitation.next_attempt = datetime.utcnow()
+            invitation.notified = False
+        else:
+            invitation = Invitation(user_id, team_name, github_team_id, github_id)
+            session.add(invitation)
+
+        session.commit()
+
+    @staticmethod
+    def get_due(limit):  # Gets the oldest pending invitations that can be sent now
+        return session.query(Invitation).filter_by(status='pending') \
+            .filter(Invitation.next_attempt <= datetime.utcnow()) \
+            .order_by(Invitation.unique_id).limit(limit).all()
+
+    @staticmethod
+    def get_awaiting(github_team_id, sent_since):  # Gets the GitHub ids of the pending and recently sent invitations
+        invitations = session.query(Invitation.github_id).filter_by(github_team_id=github_team_id) \
+            .filter((Invitation.status == 'pending') |
+                    ((Invitation.status == 'sent') & (Invitation.sent_at >= sent_since))).all()
+        return {github_id for github_id, in invitations}
+
+    @staticmethod
+    def count_pending():
+        return session.query(Invitation).filter_by(status='pending').count()
+
+    @staticmethod
+    def count_sent_since(since):
+        return session.query(Invitation).filter(Invitation.sent_at >= since).count()
+
+    @staticmethod
+    def get_unnotified():  # Gets the sent and failed invitations the members weren't told about
+        return session.query(Invitation).filter(Invitation.status != 'pending').filter_by(notified=False).all()
+
+    @staticmethod
+    def mark_sent(invitation):
+        invitation.status = 'sent'
+        invitation.sent_at = datetime.utcnow()
+        session.commit()
+
+    @staticmethod
+    def mark_retry(invitation, delay):
+        invitation.attempts += 1
+        invitation.next_attempt = datetime.utcnow() + timedelta(seconds=delay)
+        session.commit()
+
+    @staticmethod
+    def mark_failed(invitation):
+        invitation.status = 'failed'
+        session.commit()
+
+    @staticmethod
+    def mark_notified(invitations):
+        for invitation in invitations:
+            invitation.notified = True
+        session.commit()
+
+    @staticmethod
+    def delete(github_team_id, github_id):
+        invitation = Invitation.get(github_team_id, github_id)
+        if invitation:
+            session.delete(invitation)
+            session.commit()
+
+
+Base.metadata.create_all(engine)
@@ -0,0 +1,117 @@
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from github import UnknownObjectException
+
+from discord_database.config import Config
+from discord_database.team import Team
+from github_database.activity import Activity
+from github_database.activity_cursor import ActivityCursor
+from github_interface.github_scheduler import github_call, BULK
+
+# The number of repositories whose commits are fetched at the same time
+REFRESH_CONCURRENCY = 4
+# How far back the commits of a repository are fetched the first time it is refreshed, if its stats can't be fetched
+INITIAL_LOOKBACK = timedelta(days=30)
+# How many times the contributor stats of a repository are requested while GitHub is computing them
+STATS_RETRIES = 5
+STATS_RETRY_DELAY = 3.0
+
+# The repository ids mapped to the lock of their refresh, the periodic refresh and activity_check can refresh the same
+# repository at the same time and both would read and move its cursor otherwise
+refresh_locks = defaultdict(asyncio.Lock)
+
+
+# Gets the weekly contribution stats of a repository as a dict that maps each author id to their weeks. GitHub answers
+# with a 202 while it is still computing the stats (PyGithub returns None then), so the request is retried a few times
+# before giving up. Returns None if the repository was deleted and an empty dict if the stats couldn't be fetched
+async def get_contributors_weeks(repo_id):
+    def fetch_stats(g):
+        try:
+            repo = g.get_repo(repo_id)
+        except UnknownObjectException:  # If the repository was deleted
+            return None
+        return repo.get_stats_contributors() or []
+
+    for trial in range(STATS_RETRIES):
+        stats_contributors = await github_call(fetch_stats, priority=BULK)
+        if stats_contributors is None:
+            return None
+        if stats_contributors:
+            return {stat.author.id: stat.weeks for stat in stats_contributors if stat.author}
+        await asyncio.sleep(STATS_RETRY_DELAY * (trial + 1))  # The stats are still being computed
+    return {}
+
+
+# Stores the last contribution of each author from the contributor stats of a repository, which cover its whole history
+# in a single request. The stats are weekly so the last contributions are set to the start of their week, and the
+# commits of the latest week are fetched afterwards to get their exact dates. Returns the time the commits must be
+# fetched from
+async def backfill_repo_activity(repo_id, until):
+    contributors_weeks = await get_contributors_weeks(repo_id)
+    if not contributors_weeks:  # The commits of the past INITIAL_LOOKBACK are fetched instead
+        return until - INITIAL_LOOKBACK
+    for github_id, weeks in contributors_weeks.items():
+        contributed_weeks = [week.w for week in weeks if week.c]
+        if contributed_weeks:
+            Activity.set(github_id, repo_id, max(contributed_weeks), commit=False)
+    return max((week.w for weeks in contributors_weeks.values() for week in weeks), default=until - INITIAL_LOOKBACK)
+
+
+# Fetches the commits that were made to a repository since its cursor and stores the last contribution of each author.
+# The first refresh of a repository backfills its activity from its contributor stats
+async def refresh_repo_activity(repo_id):
+    async with refresh_locks[repo_id]:
+        await refresh_repo_activity_unlocked(repo_id)
+
+
+async def refresh_repo_activity_unlocked(repo_id):
+    since = ActivityCursor.get(repo_id)
+    until = datetime.utcnow()
+    if not since:
+        since = await backfill_repo_activity(repo_id, until)
+
+    def fetch_contributions(g):
+        try:
+            repo = g.get_repo(repo_id)
+        except UnknownObjectException:  # If the repository was deleted
+            return None
+        contributions = {}
+        for commit in repo.get_commits(since=since):
+            if not commit.author:  # If the commit email isn't linked to a GitHub account
+                continue
+            date = commit.commit.author.date
+            if commit.author.id not in contributions or contributions[commit.author.id] < date:
+                contributions[commit.author.id] = date
+        return contributions
+
+    contributions = await github_call(fetch_contributions, priority=BULK)
+    if contributions is None:
+        return
+    for github_id, date in contributions.items():
+        Activity.set(github_id, repo_id, date, commit=False)
+    ActivityCursor.set(repo_id, until)  # Commits the activities as well
+
+
+# Refreshes the activity of all the teams repositories
+async def refresh_all_activities():
+    teams = Team.get_all() or []
+    repo_ids = {team.repo_id for team in teams if team.repo_id}
+    semaphore = asyncio.Semaphore(REFRESH_CONCURRENCY)
+
+    async def refresh(repo_id):
+        async with semaphore:
+            await refresh_repo_activity(repo_id)
+
+    await asyncio.gather(*[refresh(repo_id) for repo_id in repo_ids])
+
+
+# Keeps the activity table warm by refreshing it every activity-refresh-time seconds
+async def refresh_activities_periodically():
+    while True:
+        try:
+            await refresh_all_activities()
+        except Exception as error:  # The refresh is retried on the next run
+            print(f'Could not refresh the contributions activity: {error}')
+        await asyncio.sleep(int(Config.get('activity-refresh-time')))
@@ -0,0 +1,58 @@
+import threading
+import time
+from datetime import datetime
+
+import jwt
+import requests
+
+from github_interface.github_configuration import github_token, app_id, app_installation_id, app_private_key, \
+    api_url
+
+# Installation tokens are refreshed this many seconds before they expire
+TOKEN_REFRESH_MARGIN = 5 * 60
+# GitHub refuses app JWTs that expire in more than 10 minutes
+JWT_DURATION = 9 * 60
+
+
+# Authenticates as a GitHub App installation. The installation token is shared by all the threads and gets refreshed
+# before it expires
+class GithubAppAuth:
+    def __init__(self, app_id, private_key, installation_id, base_url=api_url):
+        self.app_id = app_id
+        self.private_key = private_key
+        self.installation_id = installation_id
+        self.base_url = base_url
+        self.token = None
+        self.expires_at = 0  # Unix timestamp
+        self.lock = threading.Lock()
+
+    def create_jwt(self):
+        now = int(time.time())
+        payload = {"iat": now - 60, "exp": now + JWT_DURATION, "iss": self.app_id}  # iat is backdated for clock drift
+        token = jwt.encode(payload, self.private_key, algorithm="RS256")
+        return token.decode() if isinstance(token, bytes) else token
+
+    def fetch_installation_token(self):
+        response = requests.post(f'{self.base_url}/app/installations/{self.installation_id}/access_tokens',
+                                 headers={"Authorization": f'Bearer {self.create_jwt()}',
+                                          "Accept": "application/vnd.github.v3+json"},
+                                 timeout=15)
+        response.raise_for_status()
+        data = response.json()
+        expires_at = datetime.strptime(data["expires_at"], "%Y-%m-%dT%H:%M:%SZ")
+        return data["token"], (expires_at - datetime(1970, 1, 1)).total_seconds()
+
+    def get_token(self):
+        with self.lock:
+            if not self.token or self.expires_at - time.time() < TOKEN_REFRESH_MARGIN:
+                self.token, self.expires_at = self.fetch_installation_token()
+            return self.token
+
+
+app_auth = GithubAppAuth(app_id, app_private_key, app_installation_id) if app_id else None
+
+
+# Gets the token every GitHub request must be made with: an installation token when the bot is set up as a GitHub App,
+# otherwise the personal access token
+def get_token():
+    return app_auth.get_token() if app_auth else github_token
@@ -0,0 +1,26 @@
+from os import path, environ
+
+from dotenv import load_dotenv
+
+dotenv_path = path.join(path.dirname(__file__), '../.env')
+load_dotenv(dotenv_path)
+
+# GitHub data
+github_token = environ.get("GITHUB_TOKEN")
+org_name = environ.get("ORG_NAME")
+api_url = environ.get("GITHUB_API_URL") or "https://api.github.com"
+
+# The GitHub App is used instead of the personal access token when an app id is set
+app_id = environ.get("GITHUB_APP_ID")
+app_installation_id = environ.get("GITHUB_APP_INSTALLATION_ID")
+app_private_key_path = environ.get("GITHUB_APP_PRIVATE_KEY_PATH")
+app_private_key = None
+if app_id and app_private_key_path:
+    with open(app_private_key_path) as key_file:
+        app_private_key = key_file.read()
+
+# The GitHub webhook receiver is only started when a secret is set
+webhook_secret = environ.get("GITHUB_WEBHOOK_SECRET")
+webhook_host = environ.get("GITHUB_WEBHOOK_HOST") or "0.0.0.0"
+webhook_port = int(environ.get("GITHUB_WEBHOOK_PORT") or 8080)
+WEBHOOK_PATH = "/github/webhook"
@@ -0,0 +1,198 @@
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from github import Github, GithubException, RateLimitExceededException
+
+from discord_database.config import Config
+from github_interface.github_auth import get_token
+from github_interface.github_configuration import api_url
+from metrics import metrics
+from tracing import span
+
+# Request priorities, lower values are run first
+INTERACTIVE = 0  # Commands members and admins are waiting for
+BULK = 1  # Long running jobs such as activity refreshes and migrations
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# The number of GitHub requests that are run at the same time
+WORKERS = 4
+# How long all the requests are paused after hitting a secondary rate limit if GitHub doesn't send a Retry-After
+SECONDARY_LIMIT_PAUSE = 60
+# How many times a request is retried after hitting a rate limit
+RATE_LIMIT_RETRIES = 3
+
+
+# The remaining requests of a GitHub rate limit resource (core, graphql, search)
+class RateLimitBudget:
+    def __init__(self, name):
+        self.name = name
+        self.remaining = None  # None until the first response is received
+        self.limit = None
+        self.reset = 0  # Unix timestamp
+
+    def __repr__(self):
+        return f'<RateLimitBudget(name={self.name}, remaining={self.remaining}, limit={self.limit}, ' \
+               f'reset={self.reset})>'
+
+    def update(self, remaining, limit, reset):
+        self.remaining = int(remaining)
+        self.limit = int(limit)
+        self.reset = int(reset)
+
+    def seconds_to_reset(self):
+        return max(0.0, self.reset - time.time())
+
+
+# Runs every GitHub request in a thread pool by priority while keeping track of the rate limits. Each worker thread
+# has its own client as PyGithub clients can't be shared between threads. A request is a function that receives the
+# client, and it must do all of its GitHub calls inside that function. Each priority has its own queue, and a worker
+# only takes a request from a queue when the budget allows it, so the bulk requests that wait for the rate limit to
+# reset never hold a worker that an interactive request could use
+class GithubScheduler:
+    def __init__(self, workers=WORKERS):
+        self.workers_number = workers
+        self.budgets = {name: RateLimitBudget(name) for name in ("core", "graphql", "search")}
+        self.paused_until = 0  # Set when a secondary rate limit is hit
+        self.queues = {priority: deque() for priority in PRIORITY_NAMES}  # (request, future, trial)
+        self.wakeup = None  # Set when a request is queued or finished, the idle workers check the queues again
+        self.executor = None
+        self.workers = []
+        self.local = threading.local()
+        self.running = 0
+
+    def start(self):
+        if self.workers:
+            return
+        self.wakeup = asyncio.Event()
+        self.executor = ThreadPoolExecutor(max_workers=self.workers_number, thread_name_prefix="github")
+        loop = asyncio.get_event_loop()
+        # The workers run in an empty context, they would add the requests of every command to the trace of the command
+        # that started them otherwise
+        self.workers = [contextvars.Context().run(loop.create_task, self.work()) for _ in range(self.workers_number)]
+
+    async def call(self, request, priority=INTERACTIVE):
+        self.start()
+        future = asyncio.get_event_loop().create_future()
+        # The span of the request is opened here as the request runs in a worker
+        with span(f'github {PRIORITY_NAMES[priority]}', request=getattr(request, '__qualname__', None)):
+            self.queues[priority].append((request, future, 0))
+            self.wakeup.set()
+            return await future
+
+    def get_client(self):  # The client of the current worker thread, it is recreated when the token gets refreshed
+        token = get_token()
+        if getattr(self.local, "token", None) != token:
+            self.local.client = Github(token, base_url=api_url)
+            self.local.token = token
+            # Every response updates the budget of the resource it counted against (core, graphql or search)
+            requester = self.local.client._Github__requester
+            on_response = requester.DEBUG_ON_RESPONSE
+
+            def update_budget(status, headers, output):
+                self.update_from_headers(headers)
+                on_response(status, headers, output)
+
+            requester.DEBUG_ON_RESPONSE = update_budget
+        return self.local.client
+
+    def run_request(self, request):  # Runs in a worker thread
+        return request(self.get_client())
+
+    # Updates a budget from the X-RateLimit headers of a response
+    def update_from_headers(self, headers):
+        headers = {key.lower(): value for key, value in headers.items()}
+        if "x-ratelimit-remaining" not in headers:
+            return
+        budget = self.budgets.setdefault(headers.get("x-ratelimit-resource", "core"),
+                                         RateLimitBudget(headers.get("x-ratelimit-resource", "core")))
+        budget.update(headers["x-ratelimit-remaining"], headers["x-ratelimit-limit"],
+                      headers.get("x-ratelimit-reset", 0))
+
+    # Refreshes all the budgets, requesting the rate limit status doesn't count against the rate limit
+    async def refresh_budgets(self):
+        rate_limit = await self.call(lambda g: g.get_rate_limit())
+        for name in ("core", "graphql", "search"):
+            resource = getattr(rate_limit, name)
+            self.budgets[name].update(resource.remaining, resource.limit, resource.reset.timestamp())
+
+    # Gets how long the requests of a priority must wait: while a secondary rate limit is being respected, while the
+    # core budget is exhausted or, for bulk requests, while the core budget is lower than the reserve kept for
+    # interactive requests. Returns 0 when they can run
+    def get_budget_wait(self, priority):
+        core = self.budgets["core"]
+        if time.time() < self.paused_until:
+            return self.paused_until - time.time()
+        if core.remaining is not None and core.seconds_to_reset() > 0 and \
+                (core.remaining <= 0 or (priority >= BULK and core.remaining < self.bulk_reserve())):
+            return min(core.seconds_to_reset() + 1, 60)
+        return 0
+
+    @staticmethod
+    def bulk_reserve():
+        return int(Config.get('github-bulk-reserve') or 0)
+
+    def is_rate_limited(self, error):
+        if isinstance(error, RateLimitExceededException):
+            return True
+        message = str(error.data).lower() if error.data else ""
+        return error.status == 403 and ("secondary rate limit" in message or "abuse" in message)
+
+    # Takes the first request of the highest priority queue whose budget allows it to run. Waits for a request to be
+    # queued or finished, or for the shortest budget wait, when none can run
+    async def get_next_request(self):
+        while True:
+            waits = []
+            for priority in sorted(self.queues):
+                queue = self.queues[priority]
+                while queue and queue[0][1].cancelled():
+                    queue.popleft()
+                if not queue:
+                    continue
+                wait = self.get_budget_wait(priority)
+                if not wait:
+                    return (priority, *queue.popleft())
+                waits.append(wait)
+            self.wakeup.clear()
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), min(waits) if waits else None)
+            except asyncio.TimeoutError:
+                pass
+
+    async def work(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            priority, request, future, trial = await self.get_next_request()
+            self.running += 1
+            try:
+                with metrics.time_call('github', PRIORITY_NAMES[priority]):
+                    result = await loop.run_in_executor(self.executor, self.run_request, request)
+            except GithubException as error:
+                if self.is_rate_limited(error) and trial < RATE_LIMIT_RETRIES:
+                    # The exceptions of PyGithub before 1.56 don't have the response headers
+                    retry_after = (getattr(error, "headers", None) or {}).get("retry-after")
+                    self.paused_until = time.time() + (int(retry_after) if retry_after else SECONDARY_LIMIT_PAUSE)
+                    self.queues[priority].appendleft((request, future, trial + 1))  # Retried first after the pause
+                elif not future.cancelled():
+                    future.set_exception(error)
+            except Exception as error:
+                if not future.cancelled():
+                    future.set_exception(error)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.running -= 1
+                self.wakeup.set()  # The budgets were updated by the request
+
+
+scheduler = GithubScheduler()
+
+
+# Runs a GitHub request through the scheduler, the request is a function that receives a PyGithub client
+async def github_call(request, priority=INTERACTIVE):
+    return await scheduler.call(request, priority)
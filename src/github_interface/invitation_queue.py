@@ -0,0 +1,118 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import discord
+from github import GithubException, UnknownObjectException
+from requests import RequestException
+
+from discord_database.config import Config
+from discord_interface.common_functions import get_github_user_by_id
+from github_database.invitation import Invitation
+from github_interface.github_configuration import org_name
+from github_interface.github_scheduler import github_call, scheduler
+
+# How many times an invitation is retried after a transient error before it is marked as failed
+MAX_ATTEMPTS = 5
+# The delay before the first retry, it is doubled after each attempt
+RETRY_DELAY = 60
+# How long the worker waits for new invitations before checking the queue again
+IDLE_TIME = 60
+
+new_invitations = asyncio.Event()
+
+
+# Queues a member to be added to a GitHub team and wakes up the worker
+def enqueue_invitation(user_id, team_name, github_team_id, github_id):
+    Invitation.enqueue(user_id, team_name, github_team_id, github_id)
+    new_invitations.set()
+
+
+# Gets the number of invitations that can be sent now according to the per-minute and per-day budgets
+def get_invitations_budget():
+    now = datetime.utcnow()
+    sent_last_minute = Invitation.count_sent_since(now - timedelta(minutes=1))
+    sent_last_day = Invitation.count_sent_since(now - timedelta(days=1))
+    return min(int(Config.get('invitations-per-minute')) - sent_last_minute,
+               int(Config.get('invitations-per-day')) - sent_last_day)
+
+
+# Checks if a failed invitation is worth retrying: the server errors and the rate limits. The other 403s (like an
+# organization that blocked the user or a token without the admin scope) would fail the same way on every attempt
+def is_transient(error: GithubException):
+    if error.status >= 500 or error.status == 429 or scheduler.is_rate_limited(error):
+        return True
+    if error.status != 403:
+        return False
+    # The exceptions of PyGithub before 1.56 don't have the response headers, the core budget was updated from them
+    headers = {key.lower(): value for key, value in (getattr(error, "headers", None) or {}).items()}
+    if "x-ratelimit-remaining" in headers:
+        return headers["x-ratelimit-remaining"] == "0"
+    return scheduler.budgets["core"].remaining == 0
+
+
+async def send_invitation(invitation: Invitation):
+    github_team_id, github_id = invitation.github_team_id, invitation.github_id
+
+    def add_team_membership(g):
+        github_team = g.get_organization(org_name).get_team(github_team_id)
+        github_team.add_membership(get_github_user_by_id(github_id), role="member")
+
+    try:
+        await github_call(add_team_membership)
+        Invitation.mark_sent(invitation)
+    except UnknownObjectException:  # If the GitHub user or the team doesn't exist anymore
+        Invitation.mark_failed(invitation)
+    except (GithubException, RequestException) as error:
+        if isinstance(error, GithubException) and not is_transient(error):
+            return Invitation.mark_failed(invitation)
+        if invitation.attempts + 1 >= MAX_ATTEMPTS:
+            return Invitation.mark_failed(invitation)
+        Invitation.mark_retry(invitation, RETRY_DELAY * 2 ** invitation.attempts)
+
+
+# Tells each member in one DM about all of their invitations that were sent or that failed since the last time
+async def notify_invited_members(bot):
+    invitations = Invitation.get_unnotified()
+    members_invitations = {}
+    for invitation in invitations:
+        members_invitations.setdefault(invitation.user_id, []).append(invitation)
+
+    for user_id, member_invitations in members_invitations.items():
+        sent = [f'`{invitation.team_name}`' for invitation in member_invitations if invitation.status == 'sent']
+        failed = [f'`{invitation.team_name}`' for invitation in member_invitations if invitation.status == 'failed']
+        content = ''
+        if sent:
+            content += f'You have been invited to the GitHub teams of {", ".join(sent)}. Please accept the ' \
+                       f'invitation on https://github.com/orgs/{org_name}/invitation\n'
+        if failed:
+            content += f'There has been a problem adding you to the GitHub teams of {", ".join(failed)}, perhaps ' \
+                       f'you have changed your GitHub username?'
+        user = bot.get_user(user_id)
+        try:
+            if user:
+                await user.send(content)
+        except discord.Forbidden:
+            pass
+        Invitation.mark_notified(member_invitations)
+
+
+# Sends the queued invitations within the budgets, a burst of invitations is spread over multiple minutes or days
+async def process_invitations(bot):
+    budget = get_invitations_budget()
+    if budget > 0:
+        for invitation in Invitation.get_due(budget):
+            await send_invitation(invitation)
+    await notify_invited_members(bot)
+
+
+async def invitations_worker(bot):
+    while True:
+        new_invitations.clear()
+        try:
+            await process_invitations(bot)
+        except Exception as error:  # The invitations are retried on the next run
+            print(f'Could not process the GitHub invitations: {error}')
+        try:
+            await asyncio.wait_for(new_invitations.wait(), timeout=IDLE_TIME)
+        except asyncio.TimeoutError:
+            pass
@@ -0,0 +1,136 @@
+import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+from discord_database.team import Team
+from discord_database.user import User
+from github_database.activity import Activity
+from github_database.activity_cursor import ActivityCursor
+from github_database.github_membership import GithubMembership
+from github_database.github_repo import GithubRepo
+from github_database.github_team import GithubTeam
+from github_interface.github_configuration import webhook_secret, webhook_host, webhook_port, WEBHOOK_PATH
+
+
+# Checks the X-Hub-Signature-256 header that GitHub computes from the payload and the webhook secret
+def verify_signature(secret, body: bytes, signature):
+    if not signature or not signature.startswith("sha256="):
+        return False
+    expected = "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+# Changes a GitHub ISO 8601 timestamp to a naive UTC datetime like the ones stored in the database
+def parse_timestamp(timestamp):
+    date = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    return date.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Maps the lowercase GitHub usernames of the members of a repository team, and of the account that pushed, to their
+# GitHub ids. The push payloads only have the usernames of the commit authors
+def get_github_ids(repo_id, sender):
+    team = Team.get(repo_id=repo_id)
+    github_ids = {user.user_github.lower(): user.user_github_id for user in User.get_team(team.team_name) or []
+                  if user.user_github and user.user_github_id} if team else {}
+    if sender:
+        github_ids[sender["login"].lower()] = sender["id"]
+    return github_ids
+
+
+# -------------------------------- Event handlers --------------------------------
+# Credits the authors of the commits pushed to the default branch, like the refreshes that list the repository commits
+def handle_push(payload):
+    repository = payload["repository"]
+    if payload.get("deleted") or payload.get("ref") != f'refs/heads/{repository.get("default_branch")}':
+        return
+    github_ids = get_github_ids(repository["id"], payload.get("sender"))
+    contributions = {}
+    for commit in payload.get("commits", []):
+        github_id = github_ids.get((commit["author"].get("username") or "").lower())
+        if not github_id:  # If the commit email isn't linked to a GitHub account or the author isn't in the team
+            continue
+        date = parse_timestamp(commit["timestamp"])
+        if github_id not in contributions or contributions[github_id] < date:
+            contributions[github_id] = date
+    for github_id, date in contributions.items():
+        Activity.set(github_id, repository["id"], date)
+
+
+def handle_membership(payload):
+    if payload.get("scope") != "team" or "team" not in payload:
+        return
+    team_id = payload["team"]["id"]
+    github_id = payload["member"]["id"]
+    if payload["action"] == "added":
+        GithubMembership.set(team_id, github_id)
+    elif payload["action"] == "removed":
+        GithubMembership.delete(team_id, github_id)
+
+
+def handle_repository(payload):
+    repo = payload["repository"]
+    if payload["action"] == "deleted":
+        GithubRepo.delete(repo["id"])
+        Activity.delete_repo(repo["id"])
+        ActivityCursor.delete(repo["id"])
+    else:  # created, renamed, transferred...
+        GithubRepo.set(repo["id"], repo["name"])
+
+
+def handle_team(payload):
+    team = payload["team"]
+    if payload["action"] == "deleted":
+        GithubTeam.delete(team["id"])
+        GithubMembership.delete_team(team["id"])
+    else:  # created, edited, added_to_repository...
+        GithubTeam.set(team["id"], team["name"], team["slug"])
+
+
+event_handlers = {
+    "push": handle_push,
+    "membership": handle_membership,
+    "repository": handle_repository,
+    "team": handle_team,
+}
+
+
+# Verifies a delivery and passes its payload to the handler of its event
+def handle_delivery(secret, event, body: bytes, signature):
+    if not verify_signature(secret, body, signature):
+        return 401
+    handler = event_handlers.get(event)
+    if not handler:  # Includes the ping event sent when the webhook is created
+        return 204
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return 400
+    handler(payload)
+    return 200
+
+
+async def receive_delivery(request: web.Request):
+    body = await request.read()
+    status = handle_delivery(webhook_secret, request.headers.get("X-GitHub-Event"), body,
+                             request.headers.get("X-Hub-Signature-256"))
+    return web.Response(status=status)
+
+
+async def run_webhook_server():
+    app = web.Application()
+    app.router.add_post(WEBHOOK_PATH, receive_delivery)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, webhook_host, webhook_port)
+    await site.start()
+    print(f'Listening for GitHub webhooks on {webhook_host}:{webhook_port}{WEBHOOK_PATH}')
+
+
+# Starts the webhook receiver in the bot loop if a webhook secret is set
+def setup_github_webhook(bot):
+    if not webhook_secret:
+        return
+    bot.loop.create_task(run_webhook_server())
@@ -0,0 +1,47 @@
+import time
+
+# Cached entries are dropped after this many seconds even if they weren't invalidated, as some changes (like GitHub
+# usernames changes) don't trigger any invalidation
+CACHE_TTL = 60 * 60
+
+
+# Caches rendered listings (like the embeds of list_teams and list_members) until the data they show changes. The
+# database models and the Discord events invalidate the entries
+class ListingCache:
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self.entries = {}  # (kind, key) mapped to (value, expiry time)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, key=None):
+        entry = self.entries.get((kind, key))
+        if not entry or entry[1] < time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def set(self, kind, key, value):
+        self.entries[(kind, key)] = (value, time.monotonic() + self.ttl)
+
+    # Invalidates the entries of a kind with a certain key, or all the entries of a kind if no key is given. Paged
+    # listings are stored under (key, page) so the invalidation of a key drops all its pages
+    def invalidate(self, kind, key=None):
+        for entry_kind, entry_key in list(self.entries.keys()):
+            if entry_kind != kind:
+                continue
+            if key is None or entry_key == key or (isinstance(entry_key, tuple) and entry_key[0] == key):
+                self.entries.pop((entry_kind, entry_key), None)
+
+
+listings = ListingCache()
+ALL_TEAMS = '*'  # The key of the listing of all the teams members, team names can't contain a '*'
+
+
+# Invalidates the listings that show a team or its members, or the listings of all the teams if no name is given
+def invalidate_team(team_name=None):
+    if team_name is None:
+        return listings.invalidate('members')
+    listings.invalidate('members', team_name)
+    listings.invalidate('members', ALL_TEAMS)
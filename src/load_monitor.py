@@ -0,0 +1,101 @@
+import asyncio
+import time
+from collections import Counter
+
+from discord_database.config import Config
+from metrics import metrics
+
+# The load levels
+NORMAL = 0
+ELEVATED = 1  # The low priority work is deferred
+CRITICAL = 2  # The low priority commands are refused
+LOAD_NAMES = {NORMAL: "normal", ELEVATED: "elevated", CRITICAL: "critical"}
+
+# How often the event loop lag is measured, in seconds
+SAMPLE_INTERVAL = 0.5
+# How much a new sample weighs in the smoothed lag
+SMOOTHING = 0.3
+# How often the load-elevated-lag and load-critical-lag configs are read, in seconds
+THRESHOLDS_REFRESH = 60
+# The longest time a piece of work is deferred before it runs anyway, in seconds
+MAX_DEFER = 300
+
+# The commands that are deferred and refused when the bot is busy. Voting, the GitHub usernames sent in DMs and the
+# admin commands are never deferred
+LOW_PRIORITY_COMMANDS = {'list_members', 'list_teams', 'list_subreddits', 'voting_info', 'channels', 'help'}
+
+
+# Measures how late the event loop wakes up from a sleep (the time the loop spends running other work) and classifies
+# the load from the smoothed lag using the load-elevated-lag and load-critical-lag configs
+class LoadMonitor:
+    def __init__(self):
+        self.lag = 0.0  # The smoothed lag, in seconds
+        self.max_lag = 0.0
+        self.level = NORMAL
+        self.calm = asyncio.Event()  # Set while the low priority work can run
+        self.calm.set()
+        self.deferred = Counter()  # The work names mapped to the number of times they were deferred
+        self.shed = Counter()  # The work names mapped to the number of times they were refused
+        self.thresholds = (0.25, 1.0)
+        self.thresholds_read_at = 0
+
+    @staticmethod
+    def get_thresholds():
+        return float(Config.get('load-elevated-lag') or 0.25), float(Config.get('load-critical-lag') or 1)
+
+    # The thresholds used by each sample, they are read from the configs every THRESHOLDS_REFRESH seconds so the samples
+    # don't query the database
+    def get_cached_thresholds(self):
+        if time.monotonic() - self.thresholds_read_at > THRESHOLDS_REFRESH:
+            self.thresholds_read_at = time.monotonic()
+            self.thresholds = self.get_thresholds()
+        return self.thresholds
+
+    def classify(self):
+        elevated_lag, critical_lag = self.get_cached_thresholds()
+        if self.lag >= critical_lag:
+            level = CRITICAL
+        elif self.lag >= elevated_lag:
+            level = ELEVATED
+        else:
+            level = NORMAL
+
+        if level != self.level:
+            print(f'Load is now {LOAD_NAMES[level]} (event loop lag: {self.lag:.3f}s)')
+            self.level = level
+        if level == NORMAL:
+            self.calm.set()
+        else:
+            self.calm.clear()
+
+    async def run(self):
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(SAMPLE_INTERVAL)
+            lag = max(0.0, time.monotonic() - start - SAMPLE_INTERVAL)
+            self.lag = SMOOTHING * lag + (1 - SMOOTHING) * self.lag
+            self.max_lag = max(self.max_lag, lag)
+            metrics.observe_lag(lag)
+            self.classify()
+
+    # Waits until the load is normal again (or MAX_DEFER seconds) before running some low priority work
+    async def defer(self, name):
+        if self.calm.is_set():
+            return
+        self.deferred[name] += 1
+        print(f'Deferring {name}, the load is {LOAD_NAMES[self.level]} (event loop lag: {self.lag:.3f}s)')
+        try:
+            await asyncio.wait_for(self.calm.wait(), timeout=MAX_DEFER)
+        except asyncio.TimeoutError:
+            pass
+
+    # Returns whether some low priority work should be dropped because the load is critical
+    def should_shed(self, name):
+        if self.level < CRITICAL:
+            return False
+        self.shed[name] += 1
+        print(f'Shedding {name}, the load is critical (event loop lag: {self.lag:.3f}s)')
+        return True
+
+
+load_monitor = LoadMonitor()
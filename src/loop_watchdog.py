@@ -0,0 +1,93 @@
+import asyncio
+import inspect
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+
+from discord_database.config import Config
+from metrics import metrics
+from tracing import current_handler
+
+# How often the event loop marks that it is alive, in seconds
+HEARTBEAT_INTERVAL = 0.1
+# How often the watchdog thread checks the heartbeat, in seconds
+CHECK_INTERVAL = 0.05
+# How often the loop-block-threshold config is read, in seconds
+THRESHOLD_REFRESH = 60
+# The number of innermost frames of the blocking stack that are logged
+STACK_DEPTH = 15
+# The code that runs the loop callbacks (the task steps included) in their context, its frame holds the callback handle
+HANDLE_RUN_CODE = asyncio.Handle._run.__code__
+
+
+# Detects the callbacks that hold the event loop, like the synchronous PyGithub, PRAW and SQLAlchemy calls made from a
+# handler. The loop marks a heartbeat every HEARTBEAT_INTERVAL seconds and a thread checks it: when the heartbeat is
+# late by more than the loop-block-threshold config (in seconds), the thread captures the stack of the loop thread,
+# which is the stack of the blocking callback, and logs it with the name of the command or event the blocking task runs
+class LoopWatchdog:
+    def __init__(self):
+        self.loop = None
+        self.loop_thread_id = None
+        self.thread = None
+        self.last_beat = time.monotonic()
+        self.threshold = 0.5
+        self.threshold_read_at = 0
+        self.blocks = Counter()  # The names of the blocking handlers mapped to the number of times they blocked
+        self.longest_blocks = {}  # The names of the blocking handlers mapped to their longest block, in seconds
+
+    def start(self, loop):
+        if self.thread:
+            return
+        self.loop = loop
+        self.loop_thread_id = threading.get_ident()
+        self.beat()
+        self.thread = threading.Thread(target=self.watch, name="loop-watchdog", daemon=True)
+        self.thread.start()
+
+    def beat(self):  # Runs in the loop
+        self.last_beat = time.monotonic()
+        if self.last_beat - self.threshold_read_at > THRESHOLD_REFRESH:
+            self.threshold_read_at = self.last_beat
+            self.threshold = float(Config.get('loop-block-threshold') or 0.5)
+        self.loop.call_later(HEARTBEAT_INTERVAL, self.beat)
+
+    # Gets the name of the command or the event the blocking callback runs, which the tracer sets in the context of the
+    # task, or the name of the outermost coroutine of the stack. Runs in the watchdog thread, while the loop is blocked,
+    # so it only reads the captured stack and the context of the callback, which is immutable, and not the loop state
+    @staticmethod
+    def get_blocking_handler(frame):
+        coroutine_name = None
+        while frame:
+            if frame.f_code is HANDLE_RUN_CODE:
+                handle = frame.f_locals.get('self')
+                context = handle._context if handle else None  # Handle.get_context() from Python 3.12
+                return (context.get(current_handler) if context else None) or coroutine_name or \
+                    "a callback outside of any task"
+            if frame.f_code.co_flags & inspect.CO_COROUTINE:
+                coroutine_name = frame.f_code.co_name
+            frame = frame.f_back
+        return coroutine_name or "a callback outside of any task"
+
+    def watch(self):  # Runs in the watchdog thread
+        blocked_beat, handler = None, None
+        while True:
+            time.sleep(CHECK_INTERVAL)
+            last_beat = self.last_beat
+            blocked_for = time.monotonic() - last_beat - HEARTBEAT_INTERVAL
+            if blocked_beat is not None and last_beat != blocked_beat:  # The loop is running again
+                duration = last_beat - blocked_beat - HEARTBEAT_INTERVAL
+                self.longest_blocks[handler] = max(self.longest_blocks.get(handler, 0), duration)
+                metrics.observe_block(handler, duration)
+                print(f'The event loop was blocked for {duration:.2f}s by {handler}')
+                blocked_beat = None
+            if blocked_beat is None and blocked_for >= self.threshold:
+                frame = sys._current_frames().get(self.loop_thread_id)
+                blocked_beat, handler = last_beat, self.get_blocking_handler(frame)
+                self.blocks[handler] += 1
+                stack = ''.join(traceback.format_stack(frame, limit=STACK_DEPTH)) if frame else ''
+                print(f'The event loop is blocked for more than {blocked_for:.2f}s by {handler}, at:\n{stack}')
+
+
+loop_watchdog = LoopWatchdog()
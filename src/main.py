@@ -10,9 +10,16 @@ from dotenv import load_dotenv
 from discord_interface.member_interface import setup_member_interface
 from discord_interface.admin_interface import setup_admin_interface
 from discord_interface.leader_interface import setup_leader_interface
+from discord_interface.admission import setup_admission
+from discord_interface.reconciliation import setup_reconciliation
+from discord_interface.team_invites import setup_team_invites
 from reddit_interface.reddit_interface import setup_reddit_interface
+from github_interface.webhook import setup_github_webhook
+from metrics import setup_metrics
+from tracing import setup_tracing
 
 # Database
+from db import engine
 from discord_database.config import Config
 from reddit_database.languages import Language
 
@@ -30,6 +37,12 @@ setup_member_interface(bot)
 setup_admin_interface(bot)
 setup_leader_interface(bot)
 setup_reddit_interface(bot)
+setup_github_webhook(bot)
+setup_admission(bot)
+setup_reconciliation(bot)
+setup_team_invites(bot)
+setup_metrics(bot, engine)
+setup_tracing(bot)
 
 # Set default configs (channel configs should end with -channel)
 Config.set_init('idea-channel', '744885478188384287')
@@ -45,6 +58,22 @@ Config.set_init('required-votes', '5')
 Config.set_init('time-to-wait', '1209600')
 Config.set_init('github-sleep-time', '1209600')
 Config.set_init('github-required-percentage', '0.7')
+Config.set_init('activity-refresh-time', '3600')
+Config.set_init('github-bulk-reserve', '1000')
+Config.set_init('invitations-per-minute', '10')
+Config.set_init('invitations-per-day', '200')
+Config.set_init('load-elevated-lag', '0.25')
+Config.set_init('load-critical-lag', '1')
+Config.set_init('reconciliation-sweep-time', '3600')
+Config.set_init('subreddit-check-time', '86400')
+Config.set_init('reddit-posts-per-hour', '6')
+Config.set_init('reddit-subreddit-post-interval', '600')
+Config.set_init('reddit-monitor-time', '300')
+Config.set_init('reddit-monitor-days', '7')
+Config.set_init('invite-check-time', '3600')
+Config.set_init('trace-command-sample-rate', '1')
+Config.set_init('trace-event-sample-rate', '0.01')
+Config.set_init('loop-block-threshold', '0.5')
 
 Language.set("general", "testosc")
 
@@ -0,0 +1,227 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from os import environ
+
+from aiohttp import web
+from sqlalchemy import event
+
+from listing_cache import listings
+from tracing import span, start_span
+
+# The upper bounds of the latency histograms buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, float('inf'))
+
+# The metrics endpoint is only started when a port is set, it listens on the local interface by default
+metrics_host = environ.get("METRICS_HOST") or "127.0.0.1"
+metrics_port = int(environ.get("METRICS_PORT") or 0)
+METRICS_PATH = "/metrics"
+
+
+# A latency histogram with the Prometheus buckets, the counts are per bucket and not cumulative
+class Histogram:
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+
+    # The upper bound of the bucket a quantile falls in, which is precise enough to compare the commands
+    def get_quantile(self, quantile):
+        if not self.count:
+            return 0.0
+        seen = 0
+        for i, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= quantile * self.count:
+                return BUCKETS[i] if i < len(BUCKETS) - 1 else BUCKETS[-2]
+        return BUCKETS[-2]
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def get_labels(label_names, key):
+    values = key if isinstance(key, tuple) else (key,)
+    return ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(label_names, values))
+
+
+# Records the latency and the errors of the commands and of the calls to the database, GitHub, Reddit and Discord, the
+# hit ratios of the caches, the event loop lag and the handlers that blocked the loop. The external calls and the
+# blocks are recorded from other threads too, so the records are made under a lock
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.commands = {}  # The command names mapped to their histograms
+        self.command_errors = Counter()
+        self.calls = {}  # (service, operation) mapped to the histograms of the calls
+        self.call_errors = Counter()
+        self.caches = {}  # The cache names mapped to functions that return their hits and misses
+        self.loop_lag = Histogram()
+        self.blocks = {}  # The names of the handlers that blocked the event loop mapped to the histograms of the blocks
+        self.started_at = time.time()
+
+    def observe_command(self, name, seconds, failed=False):
+        with self.lock:
+            self.commands.setdefault(name, Histogram()).observe(seconds)
+            if failed:
+                self.command_errors[name] += 1
+
+    def observe_call(self, service, operation, seconds, failed=False):
+        with self.lock:
+            self.calls.setdefault((service, operation), Histogram()).observe(seconds)
+            if failed:
+                self.call_errors[(service, operation)] += 1
+
+    def observe_lag(self, seconds):
+        with self.lock:
+            self.loop_lag.observe(seconds)
+
+    def observe_block(self, handler, seconds):
+        with self.lock:
+            self.blocks.setdefault(handler, Histogram()).observe(seconds)
+
+    # Times a call to an external service, the call counts as failed if it raises. The call is also a span of the
+    # current trace
+    @contextmanager
+    def time_call(self, service, operation, **attributes):
+        start = time.perf_counter()
+        failed = True
+        with span(f'{service} {operation}', **attributes):
+            try:
+                yield
+                failed = False
+            finally:
+                self.observe_call(service, operation, time.perf_counter() - start, failed)
+
+    def register_cache(self, name, get_counts):
+        self.caches[name] = get_counts
+
+    def get_cache_ratios(self):  # Maps the cache names to their hits, misses and hit ratio
+        ratios = {}
+        for name, get_counts in self.caches.items():
+            hits, misses = get_counts()
+            ratios[name] = (hits, misses, hits / (hits + misses) if hits + misses else 0.0)
+        return ratios
+
+    # Renders all the metrics in the Prometheus text format
+    def render(self):
+        lines = []
+
+        def add_histograms(metric, description, histograms, label_names):
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} histogram')
+            for key, histogram in sorted(histograms.items()):
+                labels = get_labels(label_names, key)
+                cumulative = 0
+                for bound, bucket in zip(BUCKETS, histogram.buckets):
+                    cumulative += bucket
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f'{metric}_bucket{{{labels + "," if labels else ""}le="{le}"}} {cumulative}')
+                labels = f'{{{labels}}}' if labels else ''
+                lines.append(f'{metric}_sum{labels} {histogram.sum}')
+                lines.append(f'{metric}_count{labels} {histogram.count}')
+
+        def add_counters(metric, description, counters, label_names):
+            lines.append(f'# HELP {metric} {description}')
+            lines.append(f'# TYPE {metric} counter')
+            for key, value in sorted(counters.items()):
+                lines.append(f'{metric}{{{get_labels(label_names, key)}}} {value}')
+
+        with self.lock:
+            add_histograms('bot_command_duration_seconds', "The run time of the commands", self.commands,
+                           ('command',))
+            add_counters('bot_command_errors_total', "The number of failed commands",
+                         {name: self.command_errors[name] for name in self.commands}, ('command',))
+            add_histograms('bot_call_duration_seconds', "The duration of the calls to the database, GitHub, Reddit "
+                           "and Discord", self.calls, ('service', 'operation'))
+            add_counters('bot_call_errors_total', "The number of failed calls",
+                         {key: self.call_errors[key] for key in self.calls}, ('service', 'operation'))
+            add_histograms('bot_event_loop_lag_seconds', "How late the event loop wakes up from a sleep",
+                           {(): self.loop_lag}, ())
+            add_histograms('bot_event_loop_block_duration_seconds', "How long the handlers blocked the event loop",
+                           self.blocks, ('handler',))
+        cache_ratios = self.get_cache_ratios()
+        for kind, index in (('hits', 0), ('misses', 1)):
+            lines.append(f'# HELP bot_cache_{kind}_total The number of cache {kind}')
+            lines.append(f'# TYPE bot_cache_{kind}_total counter')
+            for name, counts in sorted(cache_ratios.items()):
+                lines.append(f'bot_cache_{kind}_total{{cache="{escape_label(name)}"}} {counts[index]}')
+        lines.append('# HELP bot_start_time_seconds When the bot started, as a Unix timestamp')
+        lines.append('# TYPE bot_start_time_seconds gauge')
+        lines.append(f'bot_start_time_seconds {self.started_at}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+# Times the database statements, by their first keyword (SELECT, INSERT...), and adds them to the current trace
+def instrument_database(engine):
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        operation = statement.split(None, 1)[0].upper()
+        statement_span = start_span(f'database {operation}', statement=statement[:200])
+        conn.info.setdefault('query_start', []).append((time.perf_counter(), statement_span))
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        start, statement_span = conn.info['query_start'].pop()
+        metrics.observe_call('database', statement.split(None, 1)[0].upper(), time.perf_counter() - start)
+        if statement_span:
+            statement_span.finish()
+
+    @event.listens_for(engine, "handle_error")
+    def on_error(exception_context):
+        starts = exception_context.connection.info.get('query_start') if exception_context.connection else None
+        if starts:
+            start, statement_span = starts.pop()
+            operation = (exception_context.statement or 'unknown').split(None, 1)[0].upper()
+            metrics.observe_call('database', operation, time.perf_counter() - start, failed=True)
+            if statement_span:
+                statement_span.finish(exception_context.original_exception)
+
+
+# Times the requests the bot makes to the Discord API, by route (like "POST /channels/{channel_id}/messages"), so that
+# the requests to different channels are grouped
+def instrument_discord(http):
+    request = http.request
+
+    async def timed_request(route, **kwargs):
+        with metrics.time_call('discord', f'{route.method} {route.path}'):
+            return await request(route, **kwargs)
+
+    http.request = timed_request
+
+
+async def serve_metrics(request: web.Request):
+    return web.Response(text=metrics.render(), content_type='text/plain', charset='utf-8')
+
+
+async def run_metrics_server():
+    app = web.Application()
+    app.router.add_get(METRICS_PATH, serve_metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, metrics_host, metrics_port)
+    await site.start()
+    print(f'Serving the metrics on {metrics_host}:{metrics_port}{METRICS_PATH}')
+
+
+# Instruments the database and the Discord requests, and starts the metrics endpoint in the bot loop if a port is set.
+# The commands are timed by the admission hooks, as a bot only has one before and one after invoke hook
+def setup_metrics(bot, engine):
+    instrument_database(engine)
+    instrument_discord(bot.http)
+    metrics.register_cache('listings', lambda: (listings.hits, listings.misses))
+    if metrics_port:
+        bot.loop.create_task(run_metrics_server())
@@ -34,6 +34,20 @@ class Language(Base):
         languages = session.query(Language)
         return languages if languages else None
 
+    @staticmethod
+    def get_page(offset, limit, name=None):  # Gets a page of the subreddits of a language, or of all the languages
+        query = session.query(Language)
+        if name:
+            query = query.filter_by(name=name)
+        return query.order_by(Language.name, Language.subreddit).offset(offset).limit(limit).all()
+
+    @staticmethod
+    def count(name=None):
+        query = session.query(Language)
+        if name:
+            query = query.filter_by(name=name)
+        return query.count()
+
     @staticmethod
     def set(name, subreddit):  # Sets a language to a certain subreddit
         language = Language.get(name, subreddit)
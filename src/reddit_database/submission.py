@@ -0,0 +1,79 @@
+from sqlalchemy import Column, String, BigInteger, Text
+from sqlalchemy.orm import relationship
+
+from db import Base, session, engine
+
+
+# The reddit submission model: a reddit post that is waiting for an approval or to be submitted to one or more
+# subreddits (its targets). It is keyed by the id of its message in the pending reddit channel, so the approvals are
+# looked up directly from the reactions
+class Submission(Base):
+    __tablename__ = 'submissions'
+
+    message_id = Column(BigInteger, primary_key=True)
+    author_id = Column(BigInteger)  # The Discord id of the member who wrote the post
+    team_name = Column(String)
+    title = Column(String)
+    body = Column(Text)
+    status = Column(String)  # pending, approved or done (once all of its targets are submitted or have failed)
+
+    targets = relationship("SubmissionTarget", back_populates="submission", cascade="all, delete, delete-orphan")
+
+    # Constructor and str
+    def __init__(self, message_id, author_id, team_name, title, body):
+        self.message_id = message_id
+        self.author_id = author_id
+        self.team_name = team_name
+        self.title = title
+        self.body = body
+        self.status = 'pending'
+
+    def __repr__(self):
+        return f'<Submission(message_id={self.message_id}, team_name={self.team_name}, status={self.status})>'
+
+    def get_subreddits_str(self):
+        return ", ".join(f'r/{target.subreddit}' for target in self.targets)
+
+    # Static interface
+    @staticmethod
+    def get(message_id):
+        submission = session.query(Submission).filter_by(message_id=message_id).first()
+        return submission if submission else None
+
+    @staticmethod
+    def get_pending_of(author_id):  # Gets the latest pending submission of a member
+        submission = session.query(Submission).filter_by(author_id=author_id).filter_by(status='pending') \
+            .order_by(Submission.message_id.desc()).first()
+        return submission if submission else None
+
+    @staticmethod
+    def add(message_id, author_id, team_name, title, body, subreddits):
+        submission = Submission(message_id, author_id, team_name, title, body)
+        submission.targets = [SubmissionTarget(message_id, subreddit) for subreddit in subreddits]
+        session.add(submission)
+        session.commit()
+        return submission
+
+    @staticmethod
+    def edit(submission, title, body):
+        submission.title = title
+        submission.body = body
+        session.commit()
+
+    @staticmethod
+    def set_status(submission, status):
+        submission.status = status
+        session.commit()
+
+    @staticmethod
+    def delete(message_id):
+        submission = Submission.get(message_id)
+        if submission:
+            session.delete(submission)
+            session.commit()
+
+
+# Imported after the submissions table is defined, as the submission targets table refers to it
+from reddit_database.submission_target import SubmissionTarget
+
+Base.metadata.create_all(engine)
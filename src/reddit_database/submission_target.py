@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.orm import relationship
+
+from db import Base, session, engine
+
+
+# The submission target model: a subreddit a submission is posted to, along with the outcome of the posting
+class SubmissionTarget(Base):
+    __tablename__ = 'submission_targets'
+
+    unique_id = Column(Integer, primary_key=True)
+    message_id = Column(BigInteger, ForeignKey("submissions.message_id"))
+    subreddit = Column(String)
+    status = Column(String)  # pending, submitted or failed
+    attempts = Column(Integer)
+    next_attempt = Column(DateTime)  # In UTC
+    submitted_at = Column(DateTime)  # In UTC
+    post_id = Column(String)  # The reddit id of the post once it is submitted
+    url = Column(String)
+    error = Column(String)
+    score = Column(Integer)  # Refreshed by the posts monitor
+    comments = Column(Integer)
+
+    submission = relationship("Submission", back_populates="targets")
+
+    # Constructor and str
+    def __init__(self, message_id, subreddit):
+        self.message_id = message_id
+        self.subreddit = subreddit
+        self.status = 'pending'
+        self.attempts = 0
+
+    def __repr__(self):
+        return f'<SubmissionTarget(message_id={self.message_id}, subreddit={self.subreddit}, status={self.status})>'
+
+    # Static interface
+    @staticmethod
+    def get_due():  # Gets the pending targets of the approved submissions that can be submitted now, oldest first
+        return session.query(SubmissionTarget).filter(SubmissionTarget.submission.has(status='approved')) \
+            .filter(SubmissionTarget.status == 'pending') \
+            .filter(SubmissionTarget.next_attempt <= datetime.utcnow()) \
+            .order_by(SubmissionTarget.next_attempt).all()
+
+    @staticmethod
+    def get_submitted_since(since):  # Gets the posts the bot has made since a certain time
+        return session.query(SubmissionTarget).filter(SubmissionTarget.submitted_at >= since).all()
+
+    @staticmethod
+    def get_by_post_ids(post_ids):  # Maps the reddit ids of posts to their targets
+        targets = session.query(SubmissionTarget).filter(SubmissionTarget.post_id.in_(post_ids)).all()
+        return {target.post_id: target for target in targets}
+
+    @staticmethod
+    def count_submitted_since(since):
+        return session.query(SubmissionTarget).filter(SubmissionTarget.submitted_at >= since).count()
+
+    @staticmethod
+    def get_last_submitted_at(subreddit):
+        target = session.query(SubmissionTarget).filter_by(subreddit=subreddit) \
+            .filter(SubmissionTarget.submitted_at.isnot(None)).order_by(SubmissionTarget.submitted_at.desc()).first()
+        return target.submitted_at if target else None
+
+    @staticmethod
+    def schedule(targets):  # Makes the targets of a submission that just got approved due now
+        for target in targets:
+            target.next_attempt = datetime.utcnow()
+        session.commit()
+
+    @staticmethod
+    def mark_submitted(target, post_id, url):
+        target.status = 'submitted'
+        target.submitted_at = datetime.utcnow()
+        target.post_id = post_id
+        target.url = url
+        session.commit()
+
+    @staticmethod
+    def set_stats(targets, stats):  # Sets the score and the number of comments of posts from their reddit ids
+        for target in targets:
+            if target.post_id in stats:
+                target.score, target.comments = stats[target.post_id]
+        session.commit()
+
+    @staticmethod
+    def mark_retry(target, delay, error, count_attempt=True):
+        if count_attempt:
+            target.attempts += 1
+        target.next_attempt = datetime.utcnow() + timedelta(seconds=delay)
+        target.error = error
+        session.commit()
+
+    @staticmethod
+    def mark_failed(target, error):
+        target.status = 'failed'
+        target.error = error
+        session.commit()
+
+
+Base.metadata.create_all(engine)
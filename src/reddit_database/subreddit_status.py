@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from sqlalchemy import Column, String, Boolean, DateTime
+
+from db import Base, session, engine
+
+
+# The subreddit status model: whether a subreddit exists on reddit, as of the last time it was checked
+class SubredditStatus(Base):
+    __tablename__ = 'subreddit_status'
+
+    subreddit = Column(String, primary_key=True)
+    valid = Column(Boolean)
+    checked_at = Column(DateTime)  # In UTC
+
+    # Constructor and str
+    def __init__(self, subreddit, valid):
+        self.subreddit = subreddit
+        self.valid = valid
+        self.checked_at = datetime.utcnow()
+
+    def __repr__(self):
+        return f'<SubredditStatus(subreddit={self.subreddit}, valid={self.valid}, checked_at={self.checked_at})>'
+
+    # Static interface
+    @staticmethod
+    def get(subreddit):
+        status = session.query(SubredditStatus).filter_by(subreddit=subreddit).first()
+        return status if status else None
+
+    @staticmethod
+    def get_checked_since(since):  # Gets the names of the subreddits that were checked after a certain time
+        statuses = session.query(SubredditStatus.subreddit).filter(SubredditStatus.checked_at >= since).all()
+        return {subreddit for subreddit, in statuses}
+
+    @staticmethod
+    def get_dead():  # Gets the subreddits that were found to be dead
+        return session.query(SubredditStatus).filter_by(valid=False).all()
+
+    @staticmethod
+    def set(subreddit, valid):
+        status = SubredditStatus.get(subreddit)
+
+        if status:
+            status.valid = valid
+            status.checked_at = datetime.utcnow()
+        else:
+            status = SubredditStatus(subreddit, valid)
+            session.add(status)
+
+        session.commit()
+
+    @staticmethod
+    def delete(subreddit):
+        status = SubredditStatus.get(subreddit)
+        if status:
+            session.delete(status)
+            session.commit()
+
+
+Base.metadata.create_all(engine)
@@ -0,0 +1,143 @@
+import re
+
+from reddit_database.languages import Language
+from reddit_database.subreddit_status import SubredditStatus
+
+# The number of fuzzy matches remembered before they are forgotten
+FUZZY_MATCHES_LIMIT = 1000
+
+# The names a language is commonly written as. A language of the languages table is also found from the other names of
+# its group
+ALIASES = [
+    {'javascript', 'js', 'node', 'nodejs', 'ecmascript'},
+    {'typescript', 'ts'},
+    {'python', 'py', 'python3'},
+    {'c++', 'cpp', 'cplusplus'},
+    {'c#', 'csharp', 'cs'},
+    {'go', 'golang'},
+    {'ruby', 'rb'},
+    {'rust', 'rs'},
+    {'kotlin', 'kt'},
+    {'haskell', 'hs'},
+    {'objective-c', 'objc'},
+    {'shell', 'bash', 'sh'},
+]
+
+
+# Normalizes a language name as it is stored in the languages table: lowercase, without surrounding spaces
+def normalize_language(name):
+    return ' '.join(name.lower().split())
+
+
+# Gets the key a language name is indexed under. The separators are dropped so "node.js", "Node JS" and "nodejs" are the
+# same key, the symbols of names like c++ and c# are kept
+def get_key(name):
+    return re.sub(r'[\s\-_.]', '', name.lower())
+
+
+# Gets the number of single character edits needed to change a word into another one
+def get_edit_distance(a, b, max_distance):
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, a_char in enumerate(a, 1):
+        current = [i]
+        for j, b_char in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a_char != b_char)))
+        if min(current) > max_distance:  # The rest of the rows can only be further
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+
+# The number of typos tolerated in a language name, short names must be exact as any other short name is close to them
+def get_max_distance(key):
+    if len(key) <= 2:
+        return 0
+    return 1 if len(key) <= 5 else 2
+
+
+# An in-memory copy of the languages table that resolves what members type to a language name without querying the
+# database: by key, then by alias, then by the closest key within a few typos. It is loaded when the bot starts and kept
+# up to date by the commands that change the languages table and by the subreddit status updates
+class LanguageIndex:
+    def __init__(self):
+        self.subreddits = {}  # The language names mapped to their subreddits
+        self.dead_subreddits = set()
+        self.keys = {}  # The keys and aliases mapped to the language names
+        self.keys_by_length = {}  # The keys grouped by length, so the fuzzy search only compares close lengths
+        self.fuzzy_matches = {}  # The keys that were resolved by edit distance, cleared when the keys change
+
+    def load(self):
+        self.subreddits = {}
+        for language in Language.get_all():
+            self.subreddits.setdefault(language.name, []).append(language.subreddit)
+        self.dead_subreddits = {status.subreddit for status in SubredditStatus.get_dead()}
+        self.build_keys()
+
+    def build_keys(self):
+        self.keys = {get_key(name): name for name in self.subreddits}
+        for group in ALIASES:
+            group = {get_key(alias) for alias in group}
+            names = [self.keys[alias] for alias in group if alias in self.keys]
+            if not names:
+                continue
+            for alias in group:  # The names of the table win over the aliases of other names
+                self.keys.setdefault(alias, names[0])
+        self.keys_by_length = {}
+        for key in self.keys:
+            self.keys_by_length.setdefault(len(key), []).append(key)
+        self.fuzzy_matches = {}
+
+    def add(self, name, subreddit):
+        subreddits = self.subreddits.setdefault(name, [])
+        if subreddit not in subreddits:
+            subreddits.append(subreddit)
+        self.build_keys()
+
+    def remove(self, name, subreddit):
+        subreddits = self.subreddits.get(name, [])
+        if subreddit in subreddits:
+            subreddits.remove(subreddit)
+        if not subreddits:
+            self.subreddits.pop(name, None)
+        self.build_keys()
+
+    def set_subreddit_status(self, subreddit, valid):
+        if valid:
+            self.dead_subreddits.discard(subreddit)
+        else:
+            self.dead_subreddits.add(subreddit)
+
+    # Finds the closest key within the typos tolerated for its length, or None if there is none or there is a tie
+    # between two languages
+    def find_closest(self, key):
+        if key in self.fuzzy_matches:
+            return self.fuzzy_matches[key]
+        max_distance = get_max_distance(key)
+        best_distance, best_names = max_distance + 1, set()
+        for length in range(len(key) - max_distance, len(key) + max_distance + 1):
+            for candidate in self.keys_by_length.get(length, []):
+                distance = get_edit_distance(key, candidate, min(max_distance, best_distance))
+                if distance < best_distance:
+                    best_distance, best_names = distance, {self.keys[candidate]}
+                elif distance == best_distance <= max_distance:
+                    best_names.add(self.keys[candidate])
+        name = best_names.pop() if len(best_names) == 1 else None
+        if len(self.fuzzy_matches) >= FUZZY_MATCHES_LIMIT:
+            self.fuzzy_matches = {}
+        self.fuzzy_matches[key] = name
+        return name
+
+    # Resolves what a member typed to a language name of the table, or None
+    def resolve(self, text):
+        key = get_key(text)
+        if not key:
+            return None
+        return self.keys.get(key) or self.find_closest(key)
+
+    def get_valid_subreddits(self, name):  # Gets the subreddits of a language that weren't found to be dead
+        return [subreddit for subreddit in self.subreddits.get(name, []) if subreddit not in self.dead_subreddits]
+
+
+language_index = LanguageIndex()
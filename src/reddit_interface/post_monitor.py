@@ -0,0 +1,106 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from discord_database.config import Config
+from discord_database.team import Team
+from load_monitor import load_monitor
+from reddit_database.submission_target import SubmissionTarget
+from reddit_interface.reddit_client import reddit_call
+
+# The number of posts reddit returns in one info request
+INFO_BATCH_SIZE = 100
+# The most replies fetched from the inbox on each run. The inbox is paged, a hundred replies per request, until the
+# replies that were already relayed are reached; the replies older than this limit are lost (reddit listings don't go
+# further than a thousand items anyway)
+REPLIES_LIMIT = 1000
+# The number of characters of a comment that are relayed
+COMMENT_PREVIEW_LENGTH = 300
+
+
+# Refreshes the score and the number of comments of the posts made in the last reddit-monitor-days days, a hundred
+# posts per request
+async def refresh_posts_stats():
+    since = datetime.utcnow() - timedelta(days=int(Config.get('reddit-monitor-days')))
+    targets = [target for target in SubmissionTarget.get_submitted_since(since) if target.post_id]
+    post_ids = [target.post_id for target in targets]
+    if not post_ids:
+        return
+
+    def fetch_stats(r):
+        stats = {}
+        for i in range(0, len(post_ids), INFO_BATCH_SIZE):
+            for post in r.info(fullnames=post_ids[i:i + INFO_BATCH_SIZE]):
+                stats[post.fullname] = (post.score, post.num_comments)
+        return stats
+
+    SubmissionTarget.set_stats(targets, await reddit_call(fetch_stats))
+
+
+# Gets the comments made on the posts of the bot since a certain time from the bot inbox, which gathers them all in
+# one listing however many posts there are. The listing is newest first and PRAW fetches its next page as it is read
+async def fetch_new_comments(since):
+    def fetch_comments(r):
+        comments = []
+        for comment in r.inbox.submission_replies(limit=REPLIES_LIMIT):
+            if comment.created_utc <= since:
+                break
+            author = comment.author.name if comment.author else "[deleted]"
+            comments.append((comment.link_id, author, comment.body, f'https://www.reddit.com{comment.context}',
+                             comment.created_utc))
+        else:
+            if len(comments) >= REPLIES_LIMIT:
+                print(f'More than {REPLIES_LIMIT} new comments on the reddit posts, the older ones are not relayed')
+        return comments
+
+    return await reddit_call(fetch_comments)
+
+
+# Sends the new comments on the posts of each team to the team general channel, in as few messages as possible
+async def relay_new_comments(bot):
+    since = float(Config.get('reddit-comments-since') or 0)
+    if not since:  # The comments made before the monitor was first started aren't relayed
+        return Config.set('reddit-comments-since', str(time.time()))
+    comments = await fetch_new_comments(since)
+    if not comments:
+        return
+
+    targets = SubmissionTarget.get_by_post_ids({post_id for post_id, *_ in comments})
+    channels_lines = {}
+    for post_id, author, body, link, created_utc in reversed(comments):  # Oldest first
+        target = targets.get(post_id)
+        if not target:  # A post that wasn't made through the bot
+            continue
+        team = Team.get(target.submission.team_name)
+        if not team:
+            continue
+        preview = body if len(body) <= COMMENT_PREVIEW_LENGTH else body[:COMMENT_PREVIEW_LENGTH] + "..."
+        channels_lines.setdefault(team.general_id, []).append(
+            f'**u/{author}** on "{target.submission.title}" (r/{target.subreddit}, score: {target.score}):\n'
+            f'{preview}\n<{link}>\n')
+
+    for channel_id, lines in channels_lines.items():
+        channel = bot.get_channel(channel_id)
+        if not channel:
+            continue
+        content = "New comments on your reddit posts:\n"
+        for line in lines:
+            if len(content) + len(line) > 2000:
+                await channel.send(content)
+                content = ''
+            content += line
+        await channel.send(content)
+    Config.set('reddit-comments-since', str(max(created_utc for *_, created_utc in comments)))
+
+
+# Follows the posts of the bot every reddit-monitor-time seconds. Each run costs one inbox request per hundred new
+# comments plus one info request per hundred recent posts
+async def monitor_posts_periodically(bot):
+    while True:
+        await load_monitor.defer('reddit posts monitor')
+        try:
+            await refresh_posts_stats()
+            await relay_new_comments(bot)
+        except Exception as error:  # The posts are checked again on the next run
+            print(f'Could not check the reddit posts: {error}')
+        await asyncio.sleep(int(Config.get('reddit-monitor-time')))
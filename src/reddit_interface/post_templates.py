@@ -0,0 +1,80 @@
+import random
+from string import Formatter
+
+from reddit_interface.teams_posts_templates import titles, bodies, footers
+
+# What the project slot shows in the previews, the member replaces it with their own words
+PROJECT_PLACEHOLDER = "..."
+# The number of teams whose rendered previews are kept
+PREVIEWS_LIMIT = 100
+
+
+# Raised when a rendered post goes over the length limit of its part
+class PostTooLong(ValueError):
+    def __init__(self, name, length, limit):
+        super().__init__(f'the {name} must be less than {limit} characters long. Yours was {length} characters long')
+        self.length = length
+        self.limit = limit
+
+
+# A template compiled once into its literal parts and named slots, so rendering it is a join. The slots are checked when
+# the template is compiled, a template with an unknown or positional slot fails as soon as the bot starts
+class PostTemplate:
+    def __init__(self, text, slots):
+        self.parts = []  # The literal texts and the name of the slot that follows each of them (None for the last one)
+        for literal, slot, format_spec, conversion in Formatter().parse(text):
+            if slot is not None and (slot not in slots or format_spec or conversion):
+                raise ValueError(f'Invalid slot {{{slot}}} in the post template "{text[:40]}...", the slots are '
+                                 f'{", ".join(sorted(slots))}')
+            self.parts.append((literal, slot))
+
+    def render(self, values):
+        return ''.join(literal + (values[slot] if slot else '') for literal, slot in self.parts)
+
+
+# The templates of one part of the posts (the titles, the bodies or the footers) with their named slots and the length
+# limit of the part
+class TemplateRegistry:
+    def __init__(self, name, texts, slots, limit=None):
+        self.name = name
+        self.templates = [PostTemplate(text, set(slots)) for text in texts]
+        self.limit = limit
+        self.previews = {}  # The team names mapped to the values the previews were rendered with and the previews
+
+    def __len__(self):
+        return len(self.templates)
+
+    def get_random_index(self):
+        return random.randrange(len(self.templates))
+
+    # Picks another template than the current one, each of the others being as likely, in a single draw
+    def get_other_index(self, index):
+        return (index + random.randrange(1, len(self.templates))) % len(self.templates)
+
+    def check_length(self, text, limit=None):
+        limit = limit or self.limit
+        if limit and len(text) > limit:
+            raise PostTooLong(self.name, len(text), limit)
+        return text
+
+    def render(self, index, values, limit=None):
+        return self.check_length(self.templates[index].render(values), limit)
+
+    # Gets the previews of all the templates for a team, with the project slot left for the member to fill. They are
+    # rendered once per team, and again only when the values of the team change (a new invite for instance)
+    def get_previews(self, team_name, values):
+        values = {**values, 'project': PROJECT_PLACEHOLDER}
+        cached = self.previews.get(team_name)
+        if cached and cached[0] == values:
+            return cached[1]
+        if len(self.previews) >= PREVIEWS_LIMIT:
+            self.previews = {}
+        previews = [template.render(values) for template in self.templates]
+        self.previews[team_name] = (values, previews)
+        return previews
+
+
+title_templates = TemplateRegistry("title", titles, ['project'], limit=250)
+body_templates = TemplateRegistry("body", bodies, ['project', 'repo_link', 'invite_link', 'team_name'],
+                                  limit=20000)
+footer_templates = TemplateRegistry("footer", footers, ['author', 'bot'])
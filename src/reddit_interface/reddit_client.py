@@ -0,0 +1,46 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import praw
+import prawcore.exceptions
+
+from metrics import metrics
+from reddit_interface.reddit_configuration import client_secret, client_id, username, password, USER_AGENT
+
+# The number of threads the Reddit requests run in, which is the number of posts that are submitted at the same time.
+# PRAW clients can't be used by several threads at once, so each thread has its own client
+REDDIT_WORKERS = 3
+
+executor = ThreadPoolExecutor(max_workers=REDDIT_WORKERS, thread_name_prefix="reddit")
+local = threading.local()
+
+
+# The Reddit client of the bot account for the current thread. It is created once per thread, and PRAW reuses and
+# refreshes its access token
+def get_reddit():
+    if not getattr(local, "reddit", None):
+        local.reddit = praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=USER_AGENT,
+                                   username=username, password=password)
+    return local.reddit
+
+
+# Runs a Reddit request in one of the Reddit threads so that the event loop doesn't wait for Reddit to respond. A
+# request is a function that receives the client, and all of its Reddit calls must happen inside that function as PRAW
+# objects fetch their attributes lazily
+async def reddit_call(request):
+    operation = request.__name__ if request.__name__ != '<lambda>' else 'request'
+    with metrics.time_call('reddit', operation):
+        return await asyncio.get_event_loop().run_in_executor(executor, lambda: request(get_reddit()))
+
+
+# Checks if a subreddit exists
+async def subreddit_exists(subreddit_name):
+    def fetch_subreddit(r):
+        try:
+            r.subreddit(subreddit_name).fullname
+            return True
+        except (prawcore.exceptions.NotFound, prawcore.exceptions.Redirect):
+            return False
+
+    return await reddit_call(fetch_subreddit)
@@ -2,11 +2,11 @@ import asyncio
 import random
 
 import discord.ext.commands
-import praw
-import prawcore.exceptions
 
-from reddit_database.languages import Language
-from reddit_interface.reddit_configuration import client_secret, client_id, username, password, USER_AGENT
+from reddit_database.submission import Submission
+from reddit_interface.language_index import language_index, normalize_language
+from reddit_interface.post_templates import TemplateRegistry, PostTooLong
+from reddit_interface.submission_queue import approve_submission
 
 from discord_database.config import Config
 from discord_interface.member_interface import THUMBS_UP_EMOJI
@@ -36,8 +36,14 @@ async def get_new_template(bot, ctx):
     return message.content[2:].lstrip()
 
 
-# Get the required data in the post, whether the title or the body
-async def get_post_input(bot: discord.ext.commands.Bot, ctx, templates_list, embed: discord.Embed, *formatting):
+# Get the required data in the post, whether the title or the body. The previews of the templates are rendered once per
+# team, "another" shows another one of them and the chosen template is rendered with the member's words, within the
+# length limit
+async def get_post_input(bot: discord.ext.commands.Bot, ctx, registry: TemplateRegistry, team_name, values, limit=None,
+                         index=None):
+    previews = registry.get_previews(team_name, values)
+    index = registry.get_random_index() if index is None else index
+    embed = discord.Embed(title=f'Post {registry.name}', description=previews[index])
     await ctx.send(ctx.author.mention + ", please replace the ... with the appropriate information.\n"
                                         "Use `r: [information]` without the '[', ']'\n"
                                         "Type `r: another` to generate another template\n"
@@ -50,22 +56,19 @@ async def get_post_input(bot: discord.ext.commands.Bot, ctx, templates_list, emb
     response = message.content[2:].lstrip()
 
     if response.lower() == "another":
-        if len(templates_list) < 2:
+        if len(registry) < 2:
             await ctx.send("Other templates are not available at the moment.")
-            return await get_post_input(bot, ctx, templates_list, embed, *formatting)
-        while True:
-            new = random.choice(templates_list).format(*formatting)
-            if new != embed.description:
-                break
-        embed = discord.Embed(title=embed.title, description=new)
-        return await get_post_input(bot, ctx, templates_list, embed, *formatting)
+            return await get_post_input(bot, ctx, registry, team_name, values, limit, index)
+        return await get_post_input(bot, ctx, registry, team_name, values, limit, registry.get_other_index(index))
 
-    elif response.lower() == "create":
-        return await get_new_template(bot, ctx)
-
-    else:
+    try:
+        if response.lower() == "create":
+            return registry.check_length(await get_new_template(bot, ctx), limit)
         information = response[0].lower() + response[1:]
-        return embed.description.replace("...", information)
+        return registry.render(index, {**values, 'project': information}, limit)
+    except PostTooLong as error:
+        await ctx.send(ctx.author.mention + f", {error}")
+        return await get_post_input(bot, ctx, registry, team_name, values, limit, index)
 
 
 # Shows a preview of how the post will look like to the user
@@ -79,38 +82,35 @@ async def show_post_preview(bot: discord.ext.commands.Bot, ctx: discord.ext.comm
     if not programming_language_message:
         return
 
-    programming_language = programming_language_message.content[2:].strip().lower()
-
-    # Tries to find a subreddit in the database that corresponds to the programming language
-    language_subreddits = Language.get_all_subreddits(programming_language) or Language.get_all_subreddits('general')
+    programming_language = programming_language_message.content[2:].strip()
+
+    # Resolves the programming language from the languages index, which forgives the case, the aliases (js, cpp...) and
+    # small typos. The dead subreddits are skipped, their status is kept up to date by the subreddits revalidation sweep
+    language_name = language_index.resolve(programming_language)
+    language_subreddits = language_index.get_valid_subreddits(language_name) if language_name else []
+    notice = ""
+    if not language_subreddits:
+        notice = f"No subreddits were found for {programming_language}, the general subreddits are used instead.\n"
+        language_subreddits = language_index.get_valid_subreddits('general')
+    elif normalize_language(programming_language) != language_name:
+        notice = f"Using the subreddits of {language_name}.\n"
     while True:
-        language_subreddit = 'testosc' if not language_subreddits else random.choice(language_subreddits).subreddit
-        if language_subreddit != subreddit:
+        language_subreddit = 'testosc' if not language_subreddits else random.choice(language_subreddits)
+        if language_subreddit != subreddit or len(language_subreddits) < 2:
             break
-        elif len(language_subreddits) < 2:  # This is reached when the bot fails to post in an initial subreddit
-            # and there are no more subreddits to post in
-            await ctx.send("Couldn't find a valid subreddit to post in, please contact an administrator")
-            return
-
-    # Checks ability to post in the subreddit
-    reddit = praw.Reddit(client_id=client_id, client_secret=client_secret, user_agent=USER_AGENT,
-                         username=username, password=password)
-    try:
-        reddit.subreddit(language_subreddit).fullname
-    except (prawcore.exceptions.NotFound, prawcore.exceptions.Redirect):
-        return await show_post_preview(bot, ctx, title, body, subreddit=language_subreddit,
-                                       programming_language_message=programming_language_message)
 
     # Shows the post preview
     embed = discord.Embed(title=title, description=body)
-    content = "Here is how your post will look like on reddit.\n" \
-              f"The submission will be made in r/{language_subreddit}\n" \
-              "Use `r: confirm` to confirm\n" \
-              "Use `r: cancel` to cancel the submission"
+    content = notice + "Here is how your post will look like on reddit.\n" \
+                       f"The submission will be made in r/{language_subreddit}\n" \
+                       "Use `r: confirm` to confirm\n" \
+                       "Use `r: cancel` to cancel the submission"
 
-    # Allows the user to change the target subreddit if more than one language instance is found
+    # Allows the user to change the target subreddit or to post in all of them if more than one language instance is
+    # found
     if len(language_subreddits) > 1:
         content += "\nUse `r: another` to change the subreddit"
+        content += f"\nUse `r: all` to post in all the {len(language_subreddits)} subreddits of this language"
 
     await ctx.send(content, embed=embed)
 
@@ -127,7 +127,9 @@ async def show_post_preview(bot: discord.ext.commands.Bot, ctx: discord.ext.comm
         await ctx.send("You can't change the subreddit for this case")
         return await show_post_preview(bot, ctx, title, body)
     elif response == "confirm":
-        return title, body, language_subreddit, language_subreddits
+        return title, body, [language_subreddit]
+    elif response == "all" and len(language_subreddits) > 1:
+        return title, body, language_subreddits
     elif response == "cancel":
         return
     else:
@@ -135,17 +137,28 @@ async def show_post_preview(bot: discord.ext.commands.Bot, ctx: discord.ext.comm
         return await show_post_preview(bot, ctx, title, body)
 
 
-# Sends the post to the pending reddit channel to be approved by an admin/leader
+# Sends the post to the pending reddit channel to be approved by an admin/leader, and stores it in the submissions
+# table under the id of the pending message. The posts of the admins and team leaders are approved right away
 async def wait_for_approval(bot: discord.ext.commands.Bot, ctx: discord.ext.commands.Context,
-                            title, body, subreddit_name):
+                            title, body, subreddit_names, team_name, approved=False):
     pending_channel_id = int(Config.get('reddit-pending-channel'))
     pending_channel = bot.get_channel(pending_channel_id)
-    embed = discord.Embed(title=title, description=body).set_footer(text=f"r/{subreddit_name}")
-    message = await pending_channel.send(f"{ctx.author.mention} wants to make a submission on r/{subreddit_name}\n"
+    subreddits_str = ", ".join(f'r/{subreddit_name}' for subreddit_name in subreddit_names)
+    embed = discord.Embed(title=title, description=body).set_footer(text=subreddits_str)
+    if approved:
+        message = await pending_channel.send(f"{ctx.author.mention} is making a submission on {subreddits_str}",
+                                             embed=embed)
+        approve_submission(Submission.add(message.id, ctx.author.id, team_name, title, body, subreddit_names))
+        return await ctx.send(ctx.author.mention + ", your post has been queued, I will mention you in the approved "
+                                                   "reddit posts channel once it is submitted.")
+
+    message = await pending_channel.send(f"{ctx.author.mention} wants to make a submission on {subreddits_str}\n"
                                          f"An admin or team leader needs to approve the submission by reacting with "
                                          f"a thumbs up for the submission to be accepted\n"
                                          f"Request submission edits om the appropriate reddit posts "
                                          f"discussion channel\n"
                                          f"The author of the pending submission can edit it using #!edit_post",
                                          embed=embed)
+    Submission.add(message.id, ctx.author.id, team_name, title, body, subreddit_names)
     await message.add_reaction(THUMBS_UP_EMOJI)
+    await ctx.send(ctx.author.mention + ", your post is waiting for the approval of an admin or a team leader.")
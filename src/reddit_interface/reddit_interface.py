@@ -1,20 +1,41 @@
-import random
-
 import discord.ext.commands
-from github import Github
 
+from discord_database.config import Config
 from discord_database.team import Team
-from discord_interface.member_interface import github_token, org_name
+from discord_interface.member_interface import THUMBS_UP_EMOJI
+from github_interface.github_configuration import org_name
+from discord_interface.common_functions import get_repo_name
+from discord_interface.paginator import Paginator
+from discord_interface.team_invites import get_team_invite
+from discord_database.team_invite import TeamInvite
 from reddit_database.languages import Language
+from reddit_database.submission import Submission
+from reddit_database.subreddit_status import SubredditStatus
+from reddit_interface.language_index import language_index, normalize_language
+from reddit_interface.post_templates import title_templates, body_templates, footer_templates, PostTooLong
 from reddit_interface.reddit_functions import get_post_input, show_post_preview, wait_for_approval
-from reddit_interface.teams_posts_templates import titles, bodies, footers
+from reddit_interface.post_monitor import monitor_posts_periodically
+from reddit_interface.submission_queue import approve_submission, submissions_worker
+from reddit_interface.subreddit_validation import revalidate_subreddits_periodically
 
-title_limit = 250
-body_limit = 20000
+subreddit_sweep_task = None
+submissions_task = None
+posts_monitor_task = None
 
 
 def setup_reddit_interface(bot: discord.ext.commands.Bot):  # Bot commands and events related
     # to the reddit implementation go here. It is preferable to add functions to another file
+    @bot.listen()
+    async def on_ready():
+        global subreddit_sweep_task, submissions_task, posts_monitor_task
+        language_index.load()
+        if not subreddit_sweep_task:  # on_ready can be called multiple times on reconnects
+            subreddit_sweep_task = bot.loop.create_task(revalidate_subreddits_periodically())
+        if not submissions_task:
+            submissions_task = bot.loop.create_task(submissions_worker(bot))
+        if not posts_monitor_task:
+            posts_monitor_task = bot.loop.create_task(monitor_posts_periodically(bot))
+
     @bot.command(brief="Lets the bot make a reddit post about the team")
     async def reddit_post(ctx: discord.ext.commands.Context):
         category: discord.CategoryChannel = ctx.channel.category  # Gets the category in which the command was used
@@ -24,71 +45,122 @@ def setup_reddit_interface(bot: discord.ext.commands.Bot):  # Bot commands and e
         if not team:  # If not team was found for this category
             return await ctx.send("Please use this command in a team channel")
 
-        prompt_title = random.choice(titles).format("...")  # Chooses a random title from the title templates
-        title_embed: discord.Embed = discord.Embed(title="Post title", description=prompt_title)
-        # Asks the user to fill out the required information
-        title = await get_post_input(bot, ctx, titles, title_embed, "...")
+        # Asks the user to fill out the required information in a random title template
+        title = await get_post_input(bot, ctx, title_templates, team.team_name, {})
         if not title:
             return
-        if len(title) > title_limit:
-            await ctx.send(ctx.author.mention + f", the title length must be less than {title_limit} characters long. "
-                                                f"Yours was {len(title)} characters long")
-            return await reddit_post(ctx)
-
-        # Log into Github to get the repo link
-        g = Github(github_token)
-        repo = g.get_repo(team.repo_id)
-        if not repo:
+
+        # Get the repo link, the repository name is read from the index kept by the GitHub webhook when it is set up
+        repo_name = await get_repo_name(team.repo_id)
+        if not repo_name:
             return await ctx.send("The team repository was not found, please contact an administrator")
-        repo_link = f'https://www.github.com/{org_name}/{repo.name}'
+        repo_link = f'https://www.github.com/{org_name}/{repo_name}'
 
-        # Get the channel invite link to be used in the post body
-        invite: discord.Invite = await ctx.channel.create_invite()
-        invite_link = invite.url
+        # Get the invite link of the team channel to be used in the post body, the same invite is reused by the posts
+        team_invite: TeamInvite = await get_team_invite(ctx.channel, team.team_name)
+        invite_link = team_invite.url
+
+        # The footer added to the post body, the body must leave room for it
+        discord_user = ctx.author.name + "#" + ctx.author.discriminator
+        discord_bot = bot.user.name + "#" + bot.user.discriminator
+        footer = "\n\n" + footer_templates.render(footer_templates.get_random_index(),
+                                                  {'author': discord_user, 'bot': discord_bot})
 
         # Ask the user to fill out the required information
-        formatting = ("...", repo_link, invite_link, team.team_name)
-        prompt_body = random.choice(bodies).format(*formatting)
-        body_embed: discord.Embed = discord.Embed(title="Post body", description=prompt_body)
-        body = await get_post_input(bot, ctx, bodies, body_embed, *formatting)
+        values = {'repo_link': repo_link, 'invite_link': invite_link, 'team_name': team.team_name}
+        body = await get_post_input(bot, ctx, body_templates, team.team_name, values,
+                                    limit=body_templates.limit - len(footer))
         if not body:
             return
-        if len(body) > body_limit:
-            await ctx.send(ctx.author.mention + f", the post body must be less than {body_limit} characters long. "
-                                                f"Yours was {len(body)} characters long")
-            return await reddit_post(ctx)
-
-        # Add a footer to the post body
-        discord_user = ctx.author.name + "#" + ctx.author.discriminator
-        discord_bot = bot.user.name + "#" + bot.user.discriminator
-        body += "\n\n" + random.choice(footers).format(discord_user, discord_bot)
+        body += footer
 
         # Shows the preview of the post to be sent to the reddit channel
         post_data = await show_post_preview(bot, ctx, title, body)
         if not post_data:
             return await ctx.send(ctx.author.mention + ", your post has been cancelled.")
-        title, body, subreddit_name, language_instances = post_data
+        title, body, subreddit_names = post_data
+        TeamInvite.add_post(team_invite)
 
         # If the user is an admin or team leader, post directly on reddit
         if ctx.author.guild_permissions.administrator or discord.utils.get(ctx.author.roles, id=team.leader_role_id):
-            await wait_for_approval(bot, ctx, title, body, subreddit_name)  # TODO: Set up to post directly on reddit
+            await wait_for_approval(bot, ctx, title, body, subreddit_names, team.team_name, approved=True)
         else:  # Wait for an admin or team leader to react with a thumbs up
-            await wait_for_approval(bot, ctx, title, body, subreddit_name)
+            await wait_for_approval(bot, ctx, title, body, subreddit_names, team.team_name)
+
+    @bot.command(brief="Edits the title or the body of your pending reddit post")
+    async def edit_post(ctx, part="", *, text=""):
+        part = part.lower()
+        if part not in ("title", "body") or not text:
+            return await ctx.send(ctx.author.mention + ", please use `#!edit_post title [new title]` or "
+                                                       "`#!edit_post body [new body]`")
+        submission: Submission = Submission.get_pending_of(ctx.author.id)
+        if not submission:
+            return await ctx.send(ctx.author.mention + ", you don't have any reddit post waiting for an approval.")
+
+        title, body = submission.title, submission.body
+        try:
+            if part == "title":
+                title = title_templates.check_length(text)
+            else:
+                # Add a footer to the post body
+                discord_user = ctx.author.name + "#" + ctx.author.discriminator
+                discord_bot = bot.user.name + "#" + bot.user.discriminator
+                footer = footer_templates.render(footer_templates.get_random_index(),
+                                                 {'author': discord_user, 'bot': discord_bot})
+                body = body_templates.check_length(text + "\n\n" + footer)
+        except PostTooLong as error:
+            return await ctx.send(ctx.author.mention + f", {error}")
+        Submission.edit(submission, title, body)
+
+        pending_channel = bot.get_channel(int(Config.get('reddit-pending-channel')))
+        try:
+            message = await pending_channel.fetch_message(submission.message_id)
+            embed = discord.Embed(title=title, description=body).set_footer(text=submission.get_subreddits_str())
+            await message.edit(embed=embed)
+        except discord.NotFound:  # The pending message was deleted, the post can't be approved anymore
+            Submission.delete(submission.message_id)
+            return await ctx.send(ctx.author.mention + ", your pending post was deleted.")
+        await ctx.send(ctx.author.mention + ", your pending post has been edited.")
+
+    # Approves the pending posts when an admin or a leader of the post's team reacts with a thumbs up
+    @bot.listen()
+    async def on_raw_reaction_add(reaction):
+        if reaction.emoji.name != THUMBS_UP_EMOJI or not reaction.member or reaction.member.bot:
+            return
+        if reaction.channel_id != int(Config.get('reddit-pending-channel')):
+            return
+        submission: Submission = Submission.get(reaction.message_id)
+        if not submission or submission.status != 'pending':
+            return
+        team: Team = Team.get(submission.team_name)
+        is_leader = team and discord.utils.get(reaction.member.roles, id=team.leader_role_id)
+        if not reaction.member.guild_permissions.administrator and not is_leader:
+            return
+        approve_submission(submission)
+        pending_channel = bot.get_channel(reaction.channel_id)
+        await pending_channel.send(f'{reaction.member.mention} has approved the post of <@{submission.author_id}> '
+                                   f'on {submission.get_subreddits_str()}, it will be submitted shortly.')
 
     @bot.command(hidden=True, brief="Lists available subreddits for languages")
     async def list_subreddits(ctx, language_name=""):
+        language_name = language_index.resolve(language_name) or normalize_language(language_name)
         if language_name:
-            language_instances = Language.get_all_subreddits(language_name)
-            content = f'All the subreddits available for {language_name}'
+            title = f'All the subreddits available for {language_name}'
         else:
-            language_instances = Language.get_all()
-            content = "All the subreddits available"
+            title = "All the subreddits available"
 
-        if not language_instances:
+        if not Language.count(language_name):
             return await ctx.send("No subreddits were found for the specified language")
 
-        content += '```\n'
-        for language in language_instances:
-            content += f"r/{language.subreddit} | {language.name}\n"
-        content += '```'
-        await ctx.send(content)
+        async def render(embed, language_instances):
+            content = '```\n'
+            for language in language_instances:
+                status = SubredditStatus.get(language.subreddit)
+                content += f"r/{language.subreddit} | {language.name}"
+                content += " | dead\n" if status and not status.valid else "\n"
+            content += '```'
+            embed.description = content
+
+        paginator = Paginator(bot, ctx, title, lambda: Language.count(language_name),
+                              lambda offset, limit: Language.get_page(offset, limit, language_name), render)
+        await paginator.start()
@@ -0,0 +1,145 @@
+import asyncio
+import re
+from datetime import datetime, timedelta
+
+import praw.exceptions
+import prawcore.exceptions
+
+from discord_database.config import Config
+from reddit_database.submission import Submission
+from reddit_database.submission_target import SubmissionTarget
+from reddit_database.subreddit_status import SubredditStatus
+from reddit_interface.language_index import language_index
+from reddit_interface.reddit_client import reddit_call
+
+# How many times a submission is retried after a transient error before it is marked as failed
+MAX_ATTEMPTS = 5
+# The delay before the first retry, it is doubled after each attempt
+RETRY_DELAY = 60
+# How long the worker waits for new approved submissions before checking the queue again
+IDLE_TIME = 60
+
+new_submissions = asyncio.Event()
+
+
+# Queues the targets of a submission to be posted on reddit and wakes up the worker
+def approve_submission(submission: Submission):
+    SubmissionTarget.schedule(submission.targets)
+    Submission.set_status(submission, 'approved')
+    new_submissions.set()
+
+
+# Gets how long reddit asks to wait before posting again from a RATELIMIT error, if the error is one
+def get_rate_limit_delay(error: praw.exceptions.RedditAPIException):
+    for item in error.items:
+        if item.error_type != "RATELIMIT":
+            continue
+        match = re.search(r'(\d+) (minute|second)', item.message)
+        if not match:
+            return RETRY_DELAY
+        return int(match.group(1)) * (60 if match.group(2) == "minute" else 1) + 1
+    return None
+
+
+# Gets the number of posts the bot account can make now according to the reddit-posts-per-hour budget
+def get_posts_budget():
+    submitted_last_hour = SubmissionTarget.count_submitted_since(datetime.utcnow() - timedelta(hours=1))
+    return int(Config.get('reddit-posts-per-hour')) - submitted_last_hour
+
+
+# Checks if the bot can post in a subreddit again, the posts in a subreddit are spaced by
+# reddit-subreddit-post-interval seconds
+def is_subreddit_ready(subreddit):
+    last_submitted_at = SubmissionTarget.get_last_submitted_at(subreddit)
+    if not last_submitted_at:
+        return True
+    interval = timedelta(seconds=int(Config.get('reddit-subreddit-post-interval')))
+    return last_submitted_at + interval <= datetime.utcnow()
+
+
+# Checks if a failed request is worth retrying: the connection errors, the server errors, the 429 responses and the
+# responses that were cut (which reddit answers with a 200 and invalid JSON)
+def is_transient(error: prawcore.exceptions.PrawcoreException):
+    if isinstance(error, (prawcore.exceptions.RequestException, prawcore.exceptions.BadJSON)):
+        return True
+    status = error.response.status_code
+    return status >= 500 or status == 429
+
+
+# Posts a submission to one of its subreddits. A subreddit that refuses the post is skipped, the other targets of the
+# submission aren't affected
+async def submit_target(target: SubmissionTarget):
+    subreddit_name, title, body = target.subreddit, target.submission.title, target.submission.body
+
+    def submit_post(r):
+        post = r.subreddit(subreddit_name).submit(title, selftext=body)
+        return post.fullname, f'https://www.reddit.com{post.permalink}'
+
+    try:
+        post_id, url = await reddit_call(submit_post)
+    except praw.exceptions.RedditAPIException as error:
+        delay = get_rate_limit_delay(error)
+        if delay:  # Rate limits don't count as failed attempts
+            return SubmissionTarget.mark_retry(target, delay, str(error), count_attempt=False)
+        return SubmissionTarget.mark_failed(target, f'refused by reddit: {error}')
+    except (prawcore.exceptions.NotFound, prawcore.exceptions.Redirect, prawcore.exceptions.Forbidden) as error:
+        if not isinstance(error, prawcore.exceptions.Forbidden):
+            SubredditStatus.set(subreddit_name, False)
+            language_index.set_subreddit_status(subreddit_name, False)
+        return SubmissionTarget.mark_failed(target, "the bot can't post in this subreddit")
+    except (prawcore.exceptions.RequestException, prawcore.exceptions.ResponseException) as error:
+        if not is_transient(error):  # The other 4xx responses would be the same on every attempt
+            return SubmissionTarget.mark_failed(target, f'refused by reddit: {error}')
+        if target.attempts + 1 >= MAX_ATTEMPTS:
+            return SubmissionTarget.mark_failed(target, "reddit isn't responding")
+        return SubmissionTarget.mark_retry(target, RETRY_DELAY * 2 ** target.attempts, str(error))
+    SubmissionTarget.mark_submitted(target, post_id, url)
+
+
+# Tells the author how the posting went in every subreddit, once all the targets of their submission are done
+async def summarize_submission(bot, submission: Submission):
+    if any(target.status == 'pending' for target in submission.targets):
+        return
+    Submission.set_status(submission, 'done')
+
+    content = f'<@{submission.author_id}>, here is how your post "{submission.title}" went:\n'
+    for target in submission.targets:
+        if target.status == 'submitted':
+            content += f'r/{target.subreddit}: {target.url}\n'
+        else:
+            content += f'r/{target.subreddit}: skipped, {target.error}\n'
+    approved_channel = bot.get_channel(int(Config.get('reddit-approved-channel')))
+    if approved_channel:
+        await approved_channel.send(content[:2000])
+
+
+# Submits the due targets concurrently within the posting budgets: the global budget of the bot account and one post
+# per subreddit at a time. Up to REDDIT_WORKERS posts are submitted at the same time, each with its own client
+async def process_submissions(bot):
+    budget = get_posts_budget()
+    targets = []
+    subreddits = set()
+    for target in SubmissionTarget.get_due():
+        if len(targets) >= budget:
+            break
+        if target.subreddit in subreddits or not is_subreddit_ready(target.subreddit):
+            continue
+        subreddits.add(target.subreddit)
+        targets.append(target)
+
+    await asyncio.gather(*[submit_target(target) for target in targets])
+    for submission in {target.submission for target in targets}:
+        await summarize_submission(bot, submission)
+
+
+async def submissions_worker(bot):
+    while True:
+        new_submissions.clear()
+        try:
+            await process_submissions(bot)
+        except Exception as error:  # The submissions are retried on the next run
+            print(f'Could not process the reddit submissions: {error}')
+        try:
+            await asyncio.wait_for(new_submissions.wait(), timeout=IDLE_TIME)
+        except asyncio.TimeoutError:
+            pass
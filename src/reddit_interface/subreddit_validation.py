@@ -0,0 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from discord_database.config import Config
+from reddit_database.languages import Language
+from reddit_database.subreddit_status import SubredditStatus
+from reddit_interface.language_index import language_index
+from reddit_interface.reddit_client import subreddit_exists
+
+# How often the sweep looks for subreddits whose status has expired, in seconds
+SWEEP_INTERVAL = 60 * 60
+
+
+# Checks the subreddits of the languages table whose status is older than subreddit-check-time seconds (or all of them
+# if forced) and stores whether they still exist. Returns the names of the subreddits that don't exist
+async def revalidate_subreddits(force=False):
+    subreddits = {language.subreddit for language in Language.get_all()}
+    if not force:
+        since = datetime.utcnow() - timedelta(seconds=int(Config.get('subreddit-check-time')))
+        subreddits -= SubredditStatus.get_checked_since(since)
+
+    async def revalidate(subreddit):
+        try:
+            return subreddit, await subreddit_exists(subreddit)
+        except Exception as error:  # Reddit is down or the credentials are wrong, the subreddit is checked next time
+            print(f'Could not check r/{subreddit}: {error}')
+            return subreddit, None
+
+    dead_subreddits = set()
+    for subreddit, valid in await asyncio.gather(*[revalidate(subreddit) for subreddit in subreddits]):
+        if valid is None:
+            continue
+        SubredditStatus.set(subreddit, valid)
+        language_index.set_subreddit_status(subreddit, valid)
+        if not valid:
+            dead_subreddits.add(subreddit)
+    return dead_subreddits
+
+
+async def revalidate_subreddits_periodically():
+    while True:
+        dead_subreddits = await revalidate_subreddits()
+        if dead_subreddits:
+            print(f'These subreddits don\'t exist anymore: {", ".join(sorted(dead_subreddits))}')
+        await asyncio.sleep(SWEEP_INTERVAL)
@@ -0,0 +1,6 @@
+# The tests are run from the src folder with: python -m unittest
+# They use an in-memory database, which must be set before the models are imported
+from os import environ
+
+environ["ENV"] = "test"
+environ["DATABASE_URL"] = "sqlite://"
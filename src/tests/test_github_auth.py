@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from github_interface.github_auth import GithubAppAuth, JWT_DURATION, TOKEN_REFRESH_MARGIN
+
+APP_ID = "81234"
+INSTALLATION_ID = "9912345"
+
+
+# A stand-in for the GitHub installation access tokens endpoint. It checks the app JWT with the app public key and
+# answers with a new token that expires in expires_in seconds
+class AccessTokensHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        if self.path != f'/app/installations/{INSTALLATION_ID}/access_tokens':
+            self.send_response(404)
+            self.end_headers()
+            return
+        scheme, _, app_jwt = self.headers.get("Authorization", "").partition(" ")
+        try:
+            claims = jwt.decode(app_jwt, server.public_key, algorithms=["RS256"])
+        except jwt.InvalidTokenError:
+            claims = None
+        if scheme != "Bearer" or not claims:
+            self.send_response(401)
+            self.end_headers()
+            return
+        server.claims.append(claims)
+        expires_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(time.time() + server.expires_in))
+        body = json.dumps({"token": f'ghs_token{len(server.claims)}', "expires_at": expires_at}).encode()
+        self.send_response(201)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestGithubAppAuth(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.private_key = private_key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                                    serialization.NoEncryption()).decode()
+        cls.server = HTTPServer(("127.0.0.1", 0), AccessTokensHandler)
+        cls.server.public_key = private_key.public_key()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.server.claims = []
+        self.server.expires_in = 3600
+        self.auth = GithubAppAuth(APP_ID, self.private_key, INSTALLATION_ID,
+                                  base_url=f'http://127.0.0.1:{self.server.server_port}')
+
+    def test_jwt_claims(self):
+        before = int(time.time())
+        self.auth.get_token()
+        claims = self.server.claims[0]
+        self.assertEqual(claims["iss"], APP_ID)
+        self.assertLessEqual(claims["iat"], before - 30)  # Backdated for the clock drift
+        self.assertLessEqual(claims["exp"] - int(time.time()), JWT_DURATION)
+        self.assertLessEqual(claims["exp"] - claims["iat"], 10 * 60)  # GitHub refuses longer JWTs
+
+    def test_token_is_cached(self):
+        tokens = {self.auth.get_token() for _ in range(3)}
+        self.assertEqual(tokens, {"ghs_token1"})
+        self.assertEqual(len(self.server.claims), 1)
+
+    def test_token_is_refreshed_inside_the_margin(self):
+        self.server.expires_in = TOKEN_REFRESH_MARGIN - 60
+        self.assertEqual(self.auth.get_token(), "ghs_token1")
+        self.server.expires_in = 3600
+        self.assertEqual(self.auth.get_token(), "ghs_token2")  # The first token expires inside the margin
+        self.assertEqual(self.auth.get_token(), "ghs_token2")
+        self.assertEqual(len(self.server.claims), 2)
+
+    def test_token_is_refreshed_when_the_margin_is_reached(self):
+        self.assertEqual(self.auth.get_token(), "ghs_token1")
+        self.auth.expires_at = time.time() + TOKEN_REFRESH_MARGIN - 1  # As if 55 minutes had passed
+        self.assertEqual(self.auth.get_token(), "ghs_token2")
+
+    def test_threads_share_one_refresh(self):
+        tokens = []
+        threads = [threading.Thread(target=lambda: tokens.append(self.auth.get_token())) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(set(tokens), {"ghs_token1"})
+        self.assertEqual(len(self.server.claims), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
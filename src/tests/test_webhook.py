@@ -0,0 +1,162 @@
+import hashlib
+import hmac
+import json
+import unittest
+from datetime import datetime
+from os import path
+
+from db import session
+from discord_database.team import Team
+from discord_database.user import User
+from github_database.activity import Activity
+from github_database.activity_cursor import ActivityCursor
+from github_database.github_membership import GithubMembership
+from github_database.github_repo import GithubRepo
+from github_database.github_team import GithubTeam
+from github_interface.webhook import handle_delivery, verify_signature
+
+SECRET = "webhook-test-secret"
+REPO_ID = 301234567
+TEAM_ID = 4123456
+
+
+def read_payload(name):
+    with open(path.join(path.dirname(__file__), "payloads", f'{name}.json'), "rb") as payload_file:
+        return payload_file.read()
+
+
+def sign(body, secret=SECRET):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def deliver(event, body):
+    return handle_delivery(SECRET, event, body, sign(body))
+
+
+def change_payload(name, **changes):  # Gets a recorded payload with some of its top level fields changed
+    payload = json.loads(read_payload(name))
+    payload.update(changes)
+    return json.dumps(payload).encode()
+
+
+class WebhookTestCase(unittest.TestCase):
+    def setUp(self):
+        for model in (Activity, ActivityCursor, GithubMembership, GithubRepo, GithubTeam, User, Team):
+            session.query(model).delete()
+        session.commit()
+
+
+class TestSignature(WebhookTestCase):
+    def test_valid_signature(self):
+        body = read_payload("ping")
+        self.assertTrue(verify_signature(SECRET, body, sign(body)))
+
+    def test_rejects_wrong_secret(self):
+        body = read_payload("repository")
+        self.assertEqual(handle_delivery(SECRET, "repository", body, sign(body, "another-secret")), 401)
+        self.assertIsNone(GithubRepo.get(REPO_ID))
+
+    def test_rejects_changed_body(self):
+        body = read_payload("repository")
+        signature = sign(body)
+        changed_body = body.replace(b"weather-bot", b"other-bot")
+        self.assertEqual(handle_delivery(SECRET, "repository", changed_body, signature), 401)
+        self.assertIsNone(GithubRepo.get(REPO_ID))
+
+    def test_rejects_missing_and_sha1_signatures(self):
+        body = read_payload("repository")
+        sha1_signature = "sha1=" + hmac.new(SECRET.encode(), body, hashlib.sha1).hexdigest()
+        self.assertEqual(handle_delivery(SECRET, "repository", body, None), 401)
+        self.assertEqual(handle_delivery(SECRET, "repository", body, sha1_signature), 401)
+
+    def test_ignores_other_events(self):
+        self.assertEqual(deliver("ping", read_payload("ping")), 204)
+
+    def test_rejects_invalid_json(self):
+        self.assertEqual(deliver("push", b"not json"), 400)
+
+
+class TestPush(WebhookTestCase):
+    def setUp(self):
+        super().setUp()
+        Team.set("weather-bot", 1, 2, 3, 4, TEAM_ID, REPO_ID)
+        User.set(10, "weather-bot", "alice-dev", 5550001)
+        User.set(11, "weather-bot", "Bob-Codes", 5550002)
+
+    def test_credits_the_commit_authors(self):
+        self.assertEqual(deliver("push", read_payload("push")), 200)
+        # The timestamps are changed to UTC
+        self.assertEqual(Activity.get(5550001, REPO_ID).last_contribution, datetime(2020, 10, 10, 12, 2, 11))
+        self.assertEqual(Activity.get(5550002, REPO_ID).last_contribution, datetime(2020, 10, 11, 9, 30))
+        # The author of the last commit has no GitHub account, the account that pushed isn't credited for it
+        self.assertEqual(session.query(Activity).count(), 2)
+
+    def test_credits_the_account_that_pushed_when_not_in_the_team(self):
+        session.query(User).delete()
+        session.commit()
+        self.assertEqual(deliver("push", read_payload("push")), 200)
+        self.assertEqual(Activity.get(5550001, REPO_ID).last_contribution, datetime(2020, 10, 10, 12, 2, 11))
+        self.assertIsNone(Activity.get(5550002, REPO_ID))
+
+    def test_only_moves_the_last_contribution_forward(self):
+        Activity.set(5550002, REPO_ID, datetime(2020, 10, 12))
+        deliver("push", read_payload("push"))
+        self.assertEqual(Activity.get(5550002, REPO_ID).last_contribution, datetime(2020, 10, 12))
+
+    def test_ignores_other_branches(self):
+        self.assertEqual(deliver("push", change_payload("push", ref="refs/heads/feature")), 200)
+        self.assertEqual(session.query(Activity).count(), 0)
+
+    def test_ignores_deleted_branches(self):
+        body = change_payload("push", deleted=True, commits=[], head_commit=None)
+        self.assertEqual(deliver("push", body), 200)
+        self.assertEqual(session.query(Activity).count(), 0)
+
+
+class TestMembership(WebhookTestCase):
+    def test_added_and_removed(self):
+        deliver("membership", read_payload("membership"))
+        self.assertEqual(GithubMembership.get_team(TEAM_ID), {5550002})
+        deliver("membership", change_payload("membership", action="removed"))
+        self.assertEqual(GithubMembership.get_team(TEAM_ID), set())
+
+    def test_ignores_organization_memberships(self):
+        deliver("membership", change_payload("membership", scope="organization"))
+        self.assertEqual(GithubMembership.get_team(TEAM_ID), set())
+
+
+class TestRepository(WebhookTestCase):
+    def test_created_and_renamed(self):
+        deliver("repository", read_payload("repository"))
+        self.assertEqual(GithubRepo.get(REPO_ID).name, "weather-bot")
+        payload = json.loads(read_payload("repository"))
+        payload["action"] = "renamed"
+        payload["repository"]["name"] = "forecast-bot"
+        deliver("repository", json.dumps(payload).encode())
+        self.assertEqual(GithubRepo.get(REPO_ID).name, "forecast-bot")
+
+    def test_deleted(self):
+        deliver("repository", read_payload("repository"))
+        Activity.set(5550001, REPO_ID, datetime(2020, 10, 10))
+        ActivityCursor.set(REPO_ID, datetime(2020, 10, 11))
+        deliver("repository", change_payload("repository", action="deleted"))
+        self.assertIsNone(GithubRepo.get(REPO_ID))
+        self.assertIsNone(Activity.get(5550001, REPO_ID))
+        self.assertIsNone(ActivityCursor.get(REPO_ID))
+
+
+class TestTeam(WebhookTestCase):
+    def test_created(self):
+        deliver("team", read_payload("team"))
+        self.assertEqual(GithubTeam.get(slug="weather-bot").team_id, TEAM_ID)
+
+    def test_deleted(self):
+        deliver("team", read_payload("team"))
+        deliver("membership", read_payload("membership"))
+        deliver("team", change_payload("team", action="deleted"))
+        self.assertIsNone(GithubTeam.get(TEAM_ID))
+        self.assertEqual(GithubMembership.get_team(TEAM_ID), set())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+# Summarizes the traces written by the bot: the slowest traces with their critical path (the chain of spans the trace
+# waited on), and the spans that took the most time overall.
+# Usage: python trace_report.py [--file traces.jsonl] [--name #!add_me] [--kind command] [--top 10]
+import argparse
+import glob
+import json
+from collections import defaultdict
+from os import environ
+
+# The same default as the bot, the bot modules aren't imported so the report doesn't connect to the database
+traces_path = environ.get("TRACES_PATH") or "traces.jsonl"
+
+
+def read_traces(path):
+    traces = []
+    for file_path in sorted(glob.glob(glob.escape(path) + '*')):  # The rotated files end with .1, .2...
+        with open(file_path) as traces_file:
+            for line in traces_file:
+                try:
+                    traces.append(json.loads(line))
+                except ValueError:  # A line cut by a crash
+                    continue
+    return traces
+
+
+def get_end(span):
+    return span['start'] + (span['duration'] or 0)
+
+
+# Gets the spans a span waited on, from its end backwards: the child that finished last, then the child that finished
+# before that one started, and so on. The time of a span that isn't spent in these children is its own time. Returns
+# (depth, span, own time) for the whole chain, in order
+def get_critical_path(span, children, depth=0):
+    critical_children = []
+    end = get_end(span)
+    for child in sorted(children[span['id']], key=get_end, reverse=True):
+        if get_end(child) <= end:
+            critical_children.append(child)
+            end = child['start']
+    own_time = max(0.0, span['duration'] - sum(child['duration'] for child in critical_children))
+    path = [(depth, span, own_time)]
+    for child in reversed(critical_children):
+        path += get_critical_path(child, children, depth + 1)
+    return path
+
+
+def get_children(trace):
+    children = defaultdict(list)
+    for span in trace['spans']:
+        if span['parent'] is not None and span['duration'] is not None:
+            children[span['parent']].append(span)
+    return children
+
+
+def describe_span(span):
+    attributes = ', '.join(f'{name}={str(value)[:60]}' for name, value in span['attributes'].items()
+                           if value is not None)
+    description = span['name'] + (f' ({attributes})' if attributes else '')
+    return description + (f' [error: {span["error"]}]' if span['error'] else '')
+
+
+def print_report(traces, top):
+    print(f'{len(traces)} trace(s)\n')
+    print(f'The {min(top, len(traces))} slowest traces:')
+    for trace in sorted(traces, key=lambda trace: trace['duration'], reverse=True)[:top]:
+        print(f'\n{trace["duration"] * 1000:8.1f}ms  {describe_span(trace["spans"][0])}  {trace["trace_id"]}')
+        for depth, span, own_time in get_critical_path(trace['spans'][0], get_children(trace)):
+            print(f'  {span["duration"] * 1000:8.1f}ms (own {own_time * 1000:.1f}ms)  {"  " * depth}'
+                  f'{describe_span(span)}')
+        if trace['dropped_spans']:
+            print(f'  ({trace["dropped_spans"]} span(s) dropped)')
+
+    totals = defaultdict(lambda: [0, 0.0, 0])  # The span names mapped to their count, total time and errors
+    for trace in traces:
+        for span in trace['spans'][1:]:
+            if span['duration'] is None:
+                continue
+            total = totals[span['name']]
+            total[0] += 1
+            total[1] += span['duration']
+            total[2] += 1 if span['error'] else 0
+    print('\nThe spans that took the most time:')
+    for name, (count, duration, errors) in sorted(totals.items(), key=lambda item: item[1][1], reverse=True)[:top]:
+        print(f'{duration * 1000:10.1f}ms  {count:6} call(s)  avg {duration / count * 1000:7.1f}ms  '
+              f'{errors:4} error(s)  {name}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarizes the slowest traces of the bot and their critical path")
+    parser.add_argument('--file', default=traces_path, help="the traces file, the rotated files are read too")
+    parser.add_argument('--name', help="only the traces of a command or an event, like #!add_me or on_message")
+    parser.add_argument('--kind', choices=('command', 'event'), help="only the traces of commands or of events")
+    parser.add_argument('--top', type=int, default=10, help="the number of traces and spans shown")
+    arguments = parser.parse_args()
+
+    traces = [trace for trace in read_traces(arguments.file)
+              if (not arguments.name or trace['name'] == arguments.name)
+              and (not arguments.kind or trace['kind'] == arguments.kind)]
+    if not traces:
+        return print(f'No traces were found in {arguments.file}')
+    print_report(traces, arguments.top)
+
+
+if __name__ == '__main__':
+    main()
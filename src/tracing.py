@@ -0,0 +1,183 @@
+import itertools
+import json
+import logging
+import logging.handlers
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from os import environ
+
+from discord_database.config import Config
+
+# The traces are written as one JSON object per line, the file is rotated when it gets too big
+traces_path = environ.get("TRACES_PATH") or "traces.jsonl"
+TRACES_FILE_SIZE = 10 * 1024 * 1024
+TRACES_FILES = 3  # The number of rotated files that are kept
+# The most spans kept in a trace, a listing of a big team can make hundreds of database calls
+MAX_SPANS = 500
+# How often the sampling rates are read from the configs, in seconds
+RATES_REFRESH = 60
+
+current_span = ContextVar('current_span', default=None)
+# The command or the event the current task runs. The loop watchdog thread reads it from the context of the callback
+# that blocks the loop
+current_handler = ContextVar('current_handler', default=None)
+
+
+# A timed piece of work in a trace. Its start is relative to the start of the trace
+class Span:
+    def __init__(self, trace, span_id, parent_id, name, attributes):
+        self.trace = trace
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.duration = None
+        self.error = None
+
+    def child(self, name, attributes):
+        return self.trace.add_span(self.span_id, name, attributes)
+
+    def finish(self, error=None):  # The error is an exception or a description of the failure
+        self.duration = time.perf_counter() - self.start
+        if isinstance(error, BaseException):
+            self.error = f'{type(error).__name__}: {error}'[:200]
+        elif error:
+            self.error = error
+
+    def to_dict(self):
+        return {'id': self.span_id, 'parent': self.parent_id, 'name': self.name,
+                'start': round(self.start - self.trace.root.start, 6),
+                'duration': round(self.duration, 6) if self.duration is not None else None,
+                'attributes': self.attributes, 'error': self.error}
+
+
+# The spans of a command invocation or of a gateway event. The trace is written once its root span finishes, the spans
+# that finish later (like the ones of a task the command started) aren't written
+class Trace:
+    ids = itertools.count(1)
+
+    def __init__(self, kind, name, attributes):
+        self.trace_id = f'{int(time.time() * 1000):x}-{next(Trace.ids)}'
+        self.kind = kind
+        self.started_at = time.time()
+        self.spans = []
+        self.dropped = 0
+        self.finished = False
+        self.root = self.add_span(None, name, attributes)
+
+    def add_span(self, parent_id, name, attributes):
+        if self.finished or len(self.spans) >= MAX_SPANS:
+            self.dropped += 1
+            return None
+        span = Span(self, len(self.spans), parent_id, name, attributes)
+        self.spans.append(span)
+        return span
+
+    def to_dict(self):
+        return {'trace_id': self.trace_id, 'kind': self.kind, 'name': self.root.name, 'started_at': self.started_at,
+                'duration': round(self.root.duration, 6), 'error': self.root.error, 'dropped_spans': self.dropped,
+                'spans': [span.to_dict() for span in self.spans]}
+
+
+# Starts the traces of the sampled commands and events, and writes the finished traces to the traces file. The
+# sampling rates are the trace-command-sample-rate and trace-event-sample-rate configs, from 0 (no traces) to 1
+class Tracer:
+    def __init__(self):
+        self.logger = None
+        self.rates = {'command': 0.0, 'event': 0.0}
+        self.rates_read_at = 0
+
+    def get_rate(self, kind):
+        if time.monotonic() - self.rates_read_at > RATES_REFRESH:
+            self.rates_read_at = time.monotonic()
+            for name in self.rates:
+                self.rates[name] = float(Config.get(f'trace-{name}-sample-rate') or 0)
+        return self.rates[kind]
+
+    def get_logger(self):
+        if not self.logger:
+            handler = logging.handlers.RotatingFileHandler(traces_path, maxBytes=TRACES_FILE_SIZE,
+                                                           backupCount=TRACES_FILES)
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            self.logger = logging.getLogger('traces')
+            self.logger.propagate = False
+            self.logger.setLevel(logging.INFO)
+            self.logger.addHandler(handler)
+        return self.logger
+
+    # Starts a new trace, whatever trace is current, if it is sampled. Returns the token to give to finish_trace. The
+    # current handler is set in any case, so the loop watchdog can blame a block on it
+    def start_trace(self, kind, name, **attributes):
+        current_handler.set(name)
+        if random.random() >= self.get_rate(kind):
+            return current_span.set(None)
+        return current_span.set(Trace(kind, name, attributes).root)
+
+    def finish_trace(self, token, error=None):
+        root = current_span.get()
+        current_span.reset(token)
+        if not root:
+            return
+        root.finish(error)
+        root.trace.finished = True
+        try:
+            self.get_logger().info(json.dumps(root.trace.to_dict(), default=str))
+        except OSError as write_error:  # The traces are lost but the command isn't affected
+            print(f'Could not write the trace of {root.name}: {write_error}')
+
+    @contextmanager
+    def trace(self, kind, name, **attributes):
+        token = self.start_trace(kind, name, **attributes)
+        error = None
+        try:
+            yield
+        except BaseException as raised:
+            error = raised
+            raise
+        finally:
+            self.finish_trace(token, error)
+
+
+tracer = Tracer()
+
+
+# Opens a child span of the current span for the duration of the block, nothing is recorded outside of a sampled trace
+@contextmanager
+def span(name, **attributes):
+    parent = current_span.get()
+    child = parent.child(name, attributes) if parent else None
+    if not child:
+        yield None
+        return
+    token = current_span.set(child)
+    error = None
+    try:
+        yield child
+    except BaseException as raised:
+        error = raised
+        raise
+    finally:
+        current_span.reset(token)
+        child.finish(error)
+
+
+# Starts and finishes a child span without a block, for the calls that are timed by callbacks (like the database
+# statements)
+def start_span(name, **attributes):
+    parent = current_span.get()
+    return parent.child(name, attributes) if parent else None
+
+
+# Gives each gateway event listener its own trace. The commands start their own trace from the admission hooks, so the
+# trace of the message event that invoked a command doesn't include the command
+def setup_tracing(bot):
+    run_event = bot._run_event
+
+    async def traced_run_event(coro, event_name, *args, **kwargs):
+        with tracer.trace('event', event_name, listener=getattr(coro, '__qualname__', None)):
+            await run_event(coro, event_name, *args, **kwargs)
+
+    bot._run_event = traced_run_event